@@ -1,29 +1,36 @@
 from manim import *
+from components import component, point_key, textbox
 
-class Magnets(Scene):
-    def construct(self):
-        magnets = self.createMagnets()
-        self.add(magnets)
 
-    def createMagnets(self):
-        north_pole = self.create_textbox(RED, "N", WHITE)
-        south_pole = self.create_textbox(BLUE, "S", WHITE)
-        
-        north = self.createNorthPole(north_pole)
-        south = self.createSouthPole(south_pole)
+# The magnet geometry is built once and copied, scenes can use it without creating a Magnets scene
+
+def create_magnets() -> VGroup:
+    return component("magnets", (), _create_magnets)
+
+
+def _create_magnets() -> VGroup:
+    north_pole = textbox(RED, "N", WHITE, 1.5, 3.5, label=Text)
+    south_pole = textbox(BLUE, "S", WHITE, 1.5, 3.5, label=Text)
 
-        poles = VGroup(south, north).arrange(DOWN, buff=2.5)
+    north = create_north_pole(north_pole)
+    south = create_south_pole(south_pole)
 
-        # Draw Magnetic Field Lines
+    poles = VGroup(south, north).arrange(DOWN, buff=2.5)
 
-        start1 = north.get_edge_center(UP)
-        end1 = south.get_edge_center(DOWN)
-        h11 = start1 + RIGHT
-        h12 = end1 + LEFT
+    # Draw Magnetic Field Lines
 
+    start1 = north.get_edge_center(UP)
+    end1 = south.get_edge_center(DOWN)
+
+    mf_lines = create_field_lines(start1, end1)
+
+    magnets = VGroup(mf_lines, north, south)
+    return magnets
+
+
+def create_field_lines(start1: np.array, end1: np.array) -> VGroup:
+    def create():
         # Tried to do it with bezier curve but you couldn't easily add a tip to it
-        line1 = CubicBezier(start1, h11, h12, end1)
-        
         carr = ArcBetweenPoints(start1, end1, PI, 100)
         carr2 = ArcBetweenPoints(start1, end1, PI / 10, 2).shift(RIGHT * 0.75)
         carr3 = ArcBetweenPoints(start1, end1, PI / 10, -2).shift(LEFT * 0.75)
@@ -32,15 +39,16 @@ class Magnets(Scene):
 
         mf_lines = VGroup(carr, carr2, carr3, carr4, carr5)
         mf_lines.set_color(GRAY)
-        mf_lines.fill_opacity =0
+        mf_lines.fill_opacity = 0
         for line in mf_lines:
             line.add_tip(tip_length=0.3, tip_width=0.2)
+        return mf_lines
 
-        magnets = VGroup(mf_lines, north, south)
-        return magnets
+    return component("fieldLines", (point_key(start1), point_key(end1)), create)
 
 
-    def createNorthPole(self, north_pole: Mobject) -> Mobject:
+def create_north_pole(north_pole: Mobject) -> VGroup:
+    def create():
         offset = 3.5
         positions = [
             north_pole.get_corner(UP + LEFT),
@@ -58,13 +66,16 @@ class Magnets(Scene):
             north_pole.get_corner(UP + RIGHT),
         ]
 
-
         shape = Polygon(*positions, fill_opacity=0.3, color=RED)
         N = Text("N", color=WHITE).scale(0.7).move_to(Polygon(*np.unique(shape.get_anchors(), axis=0)[:4]).get_center())  # create text
-        north = VGroup(shape, N)
-        return north
-    
-    def createSouthPole(self, south_pole: Mobject) -> Mobject:
+        return VGroup(shape, N)
+
+    corners = (point_key(north_pole.get_corner(UP + LEFT)), point_key(north_pole.get_corner(DOWN + RIGHT)))
+    return component("northPole", corners, create)
+
+
+def create_south_pole(south_pole: Mobject) -> VGroup:
+    def create():
         offset2 = 4
         positions2 = [
             south_pole.get_corner(UP + LEFT),
@@ -83,15 +94,25 @@ class Magnets(Scene):
 
         shape2 = Polygon(*positions2, fill_opacity=0.3, color=BLUE)
         S = Text("S", color=WHITE).scale(0.7).move_to(Polygon(*np.unique(shape2.get_anchors(), axis=0)[:4]).get_center())  # create text
-        south = VGroup(shape2, S)
-        return south
-    
+        return VGroup(shape2, S)
+
+    corners = (point_key(south_pole.get_corner(UP + LEFT)), point_key(south_pole.get_corner(DOWN + RIGHT)))
+    return component("southPole", corners, create)
+
+
+class Magnets(Scene):
+    def construct(self):
+        magnets = self.createMagnets()
+        self.add(magnets)
+
+    def createMagnets(self):
+        return create_magnets()
+
+    def createNorthPole(self, north_pole: Mobject) -> Mobject:
+        return create_north_pole(north_pole)
+
+    def createSouthPole(self, south_pole: Mobject) -> Mobject:
+        return create_south_pole(south_pole)
+
     def create_textbox(self, color_, string, string_color, height=1.5, width=3.5):
-        result = VGroup()  # create a VGroup
-        box = Rectangle(  # create a box
-            height=height, width=width, fill_color=color_,
-            fill_opacity=0.2, stroke_color=color_
-        )
-        text = Text(string, color=string_color).scale(0.7).move_to(box.get_center())  # create text
-        result.add(box, text)  # add both objects to the VGroup
-        return result
\ No newline at end of file
+        return textbox(color_, string, string_color, height, width, label=Text)
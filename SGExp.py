@@ -2,43 +2,26 @@ from manim import *
 from manim.animation.animation import Animation
 from manim_cad_drawing_utils import *
 import numpy as np
+from physics import OvenModel
+import profiling
+from updaters import add_batched_updater
+from atom_cloud import AtomCloud, AtomCloudCamera
+from detector_screen import DetectorScreen
+from sg_engine import Analyzer, random_states, run_chain
+from tex_cache import Fragment, build_all, compile_fragments, prefetch
+from components import add_label, frame, textbox
 
-
-class Particle:
-    def __init__(self, oven: Circle, color) -> None:
-        self.oven = oven
-        self.random_gen = np.random.default_rng()  # Create a unique random generator for each particle
-        self.old_position = self.generate_position()
-        self.new_position = self.generate_position()
-        self.dot = Dot(color=color).scale(0.4)
-        self.dot.move_to(self.old_position)
-        self.transition_time = 2  # Time to move from old_position to new_position
-        self.time_elapsed = 0
-        self.random_gen = np.random.default_rng()  # Create a unique random generator for each particle
-
-    def generate_position(self) -> np.array:
-        oven = self.oven
-        xpos = self.random_gen.uniform(-oven.radius, oven.radius)
-        ypos = self.random_gen.uniform(-oven.radius, oven.radius)
-
-        while (xpos * xpos + ypos * ypos >= oven.radius * oven.radius):
-            xpos = self.random_gen.uniform(-oven.radius, oven.radius)
-            ypos = self.random_gen.uniform(-oven.radius, oven.radius)
-
-        return np.array([xpos, ypos, 0]) + oven.get_center()
-
-    def update_position(self, dt):
-        self.time_elapsed += dt
-        alpha = min(self.time_elapsed / self.transition_time, 1)
-        new_pos = interpolate(self.old_position, self.new_position, alpha)
-        if alpha >= 1:
-            self.old_position = self.new_position
-            self.new_position = self.generate_position()
-            self.time_elapsed = 0
-        return new_pos
+profiling.enable_from_env()
 
 
 class Oven(Scene):
+    seed = 0
+    numParticles = 10
+
+    def __init__(self, **kwargs) -> None:
+        kwargs.setdefault("camera_class", AtomCloudCamera)
+        super().__init__(**kwargs)
+
     def construct(self):
         oven = Circle(radius=1, color=RED, fill_opacity=0.2)
         oven_label = Text("Oven", color=RED).scale(0.8)
@@ -48,35 +31,52 @@ class Oven(Scene):
         oven_group = VGroup(oven, oven_label)
         self.add(oven_group)
 
-        particles = VGroup()
-        for _ in range(10):
-            p = Particle(oven, LIGHT_GRAY)
+        # All atoms move as arrays and are drawn as one point cloud, so this can go up to tens of thousands
+        atoms = OvenModel(self.numParticles, oven.radius, oven.get_center(), self.seed)
+        particles = AtomCloud(atoms.positions(), radius=DEFAULT_DOT_RADIUS * 0.4, colors=(LIGHT_GRAY,))
 
-            def particle_updater(mob: Mobject, dt):
-                new_position = p.update_position(dt)
-                mob.move_to(new_position)
-
-            p.dot.add_updater(particle_updater)
-            p.dot.update()
-            particles.add(p.dot)
+        # One updater for the whole group instead of one closure per dot
+        add_batched_updater(particles, atoms.step, atoms.positions)
 
         self.add(particles)
         self.wait(5, frozen_frame=False)
 
 
 def create_textbox(color, string, string_color, height=1, width=2):
-    result = VGroup()  # create a VGroup
-    box = Rectangle(  # create a box
-        height=height, width=width, fill_color=color,
-        fill_opacity=0.2, stroke_color=color
-    )
-    text = MathTex(string, color=string_color).scale(0.7).move_to(box.get_center())  # create text
-    result.add(box, text)  # add both objects to the VGroup
-    return result
+    return textbox(color, string, string_color, height, width)
+
+
+def create_frame(color, height=1, width=2):
+    # A textbox whose label is added later with add_label, once the prefetched text is needed
+    return frame(color, height, width)
+
+
+# The labels below show up in every SG figure, they are compiled once and copied
+
+def textbox_label(string, string_color) -> Fragment:
+    return Fragment(MathTex, string, color=string_color)
+
+
+def ket(axis, sign, suffix="") -> Fragment:
+    # |z,+> in blue or |z,-> in teal, with the axis in yellow
+    return Fragment(MathTex, rf"|{axis},{sign}\rangle{suffix}", isolate=[axis], colors={axis: YELLOW},
+                    color=BLUE if sign == "+" else TEAL)
+
+
+def beam_label(axis, sign, word, prefix="") -> Fragment:
+    # S_z+ comp. with the sign in the beam's color and the axis in yellow
+    return Fragment(MathTex, rf"{prefix}S_{axis}{sign} {word}", isolate=[sign, axis],
+                    colors={sign: BLUE if sign == "+" else TEAL, axis: YELLOW}, color=WHITE)
 
 
 class quantizedMM(Scene):
     def construct(self):
+        compile_fragments([
+            textbox_label("Oven", WHITE), textbox_label(r"SG\hat{z}", YELLOW),
+            beam_label("z", "+", "component"), beam_label("z", "-", "component"),
+            ket("z", "+"), ket("z", "-"),
+        ])
+
         # create text box
         oven = create_textbox(color=RED, string="Oven", string_color=WHITE)
 
@@ -102,28 +102,41 @@ class quantizedMM(Scene):
             Create(sz_down_line)
         )
 
-        sz_up_text = MathTex(r"S_z+ component", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(
-            sz_up_line, UP)
-        sz_down_text = MathTex(r"S_z- component", substrings_to_isolate=["-", "z"], color=WHITE).scale(0.5).next_to(
-            sz_down_line, DOWN)
-        sz_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
+        sz_up_text = beam_label("z", "+", "component").build().scale(0.5).next_to(sz_up_line, UP)
+        sz_down_text = beam_label("z", "-", "component").build().scale(0.5).next_to(sz_down_line, DOWN)
 
         self.play(
             Create(sz_up_text),
             Create(sz_down_text)
         )
 
-        # Create a tall rectangle
-        screen = Rectangle(height=3, width=1, color=DARK_GRAY, fill_opacity=0.5).align_to(sz_up_line.get_end(),
-                                                                                          RIGHT + [1, 0, 0]).shift(
-            RIGHT)
+        # Create a tall screen that counts the atoms hitting it
+        screen = DetectorScreen(height=3, width=1).align_to(sz_up_line.get_end(), RIGHT + [1, 0, 0]).shift(RIGHT)
 
         # Create the label "screen" and position it below the rectangle
         screen_label = Text("Screen", color=WHITE).scale(0.4).next_to(screen, DOWN)
 
-        # Draw the rectangle and label on the screen
-        self.play(DrawBorderThenFill(screen), Write(screen_label))
+        # Draw the rectangle and label on the screen. Only the frame is drawn in, the cells are still empty
+        # and DrawBorderThenFill would outline every one of them
+        self.add(screen)
+        self.play(DrawBorderThenFill(screen.frame), Write(screen_label))
+
+        # Stream silver atoms through SGz onto the screen, about 2000 per second
+        rng = np.random.default_rng(0)
+
+        def screen_updater(mob: DetectorScreen, dt):
+            atoms = int(2000 * dt)
+            stage = run_chain(random_states(atoms, rng), [Analyzer("z")], rng)[0]
+            y = np.concatenate((
+                np.full(stage.up, sz_up_line.get_end()[1]),
+                np.full(stage.down, sz_down_line.get_end()[1])
+            )) + rng.normal(0, 0.05, atoms)
+            x = rng.uniform(mob.get_left()[0], mob.get_right()[0], atoms)
+            mob.add_impacts(np.column_stack((x, y)))
+
+        screen.add_updater(screen_updater)
+        self.wait(4)
+        screen.clear_updaters()
 
         # Adjust the appearance to illustrate upspin and downspin
         upspin_rect = Rectangle(height=0.1, width=1, color=BLUE, fill_opacity=0.5).next_to(sz_up_line.get_end(), RIGHT,
@@ -155,15 +168,12 @@ class quantizedMM(Scene):
         self.play(FadeIn(text1))
 
         # Sup and sup_text
-        sup = MathTex(r"|z,+\rangle", substrings_to_isolate=["z"], color=BLUE).move_to(text1.get_center() + [5, 1, 0])
-        sup.set_color_by_tex("z", YELLOW)
+        sup = ket("z", "+").build().move_to(text1.get_center() + [5, 1, 0])
         sup_text = Text("spin up", color=BLUE).scale(0.3).next_to(sup, DOWN, buff=0.1)
         up = VGroup(sup, sup_text)
 
         # Sdown and sdown_text
-        sdown = MathTex(r"|z,-\rangle", substrings_to_isolate=["z"], color=TEAL).move_to(
-            text1.get_center() + [5, -1, 0])
-        sdown.set_color_by_tex("z", YELLOW)
+        sdown = ket("z", "-").build().move_to(text1.get_center() + [5, -1, 0])
         sdown_text = Text("spin down", color=TEAL).scale(0.3).next_to(sdown, DOWN, buff=0.1)
         down = VGroup(sdown, sdown_text)
 
@@ -184,14 +194,33 @@ class quantizedMM(Scene):
 
 class fig1_3a(Scene):
     def construct(self):
-        oven = create_textbox(color=RED, string="Oven", string_color=RED)
-        SGz = create_textbox(color=BLUE, string=r"SG\hat{z}", string_color=YELLOW)
+        # All text is declared first and compiled in the background while the geometry is built
+        silver_atoms_label = Fragment(MathTex, r"Ag\,Atoms", color=LIGHT_GRAY)
+        sentence1_parts = [
+            ket("z", "-"), Fragment(Tex, r" is blocked and only "), ket("z", "+"),
+            Fragment(Tex, r" is passed through second "), Fragment(Tex, r"$ SG\hat{z} $", color=YELLOW),
+            Fragment(Tex, r" setup"),
+        ]
+        sentence2_parts = [Fragment(Tex, r"We see only "), ket("z", "+"), Fragment(Tex, r" state again")]
+        sentence3_parts = [
+            Fragment(MathTex, r"\Rightarrow |z,-\rangle", color=TEAL, isolate=["z", r"\Rightarrow"],
+                     colors={"z": YELLOW, r"\Rightarrow": WHITE}),
+            Fragment(Tex, r" has no component of "), ket("z", "+"),
+        ]
+        prefetch([
+            textbox_label("Oven", RED), textbox_label(r"SG\hat{z}", YELLOW),
+            beam_label("z", "+", "comp."), beam_label("z", "-", "comp."),
+            beam_label("z", "-", "comp.", prefix=r"\text{No} \,\; "),
+            ket("z", "+"), ket("z", "-"), silver_atoms_label,
+            *sentence1_parts, *sentence2_parts, *sentence3_parts,
+        ])
+
+        oven = create_frame(color=RED)
+        SGz = create_frame(color=BLUE)
         grp1 = VGroup(oven, SGz).arrange(RIGHT, buff=1).to_edge(LEFT, buff=0.7)
-        SGz2 = create_textbox(color=BLUE, string=r"SG\hat{z}", string_color=YELLOW).shift(LEFT * 1).next_to(grp1, RIGHT,
-                                                                                                            buff=3)
+        SGz2 = create_frame(color=BLUE).shift(LEFT * 1).next_to(grp1, RIGHT, buff=3)
 
         silver_beam = Line(oven.get_right(), SGz.get_left(), color=WHITE)
-        silver_atoms = MathTex(r"Ag\,Atoms", color=LIGHT_GRAY).scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
 
         spin_line_offset = 0.3
         sz_up_line = Line(SGz.get_right() + [0, spin_line_offset, 0], SGz2.get_left() + [0, spin_line_offset, 0])
@@ -203,74 +232,32 @@ class fig1_3a(Scene):
         hatch1 = Hatch_lines(obsticle, angle=PI / 6, offset=0.1, stroke_width=2)
         hatch2 = Hatch_lines(obsticle, angle=PI / 6 + PI / 2, offset=0.1, stroke_width=2)
 
-        sz_up_text = MathTex(r"S_z+ comp.", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(
-            sz_up_line, UP)
-        sz_down_text = MathTex(r"S_z- comp.", substrings_to_isolate=["-", "z"], color=WHITE).scale(0.5).next_to(
-            sz_down_line, DOWN)
-        sz_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
-
         sz2_up_line = Line(SGz2.get_right() + [0, spin_line_offset, 0], SGz2.get_right() + [2.5, spin_line_offset, 0])
         sz2_down_line = DashedLine(
             SGz2.get_right() + [0, -spin_line_offset, 0],
             SGz2.get_right() + [2.5, -spin_line_offset, 0],
         )
 
-        sz2_up_text = MathTex(r"S_z+ comp.", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(
-            sz2_up_line, UP)
-        sz2_down_text = MathTex(r"\text{No} \,\; S_z- comp.", substrings_to_isolate=["-", "z"], color=WHITE).scale(
-            0.5).next_to(sz2_down_line, DOWN)
-        sz2_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz2_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
+        # The geometry is done, from here on the text is taken from the prefetch
+        add_label(oven, "Oven", RED)
+        add_label(SGz, r"SG\hat{z}", YELLOW)
+        add_label(SGz2, r"SG\hat{z}", YELLOW)
+        silver_atoms = silver_atoms_label.build().scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
+
+        sz_up_text = beam_label("z", "+", "comp.").build().scale(0.5).next_to(sz_up_line, UP)
+        sz_down_text = beam_label("z", "-", "comp.").build().scale(0.5).next_to(sz_down_line, DOWN)
+
+        sz2_up_text = beam_label("z", "+", "comp.").build().scale(0.5).next_to(sz2_up_line, UP)
+        sz2_down_text = beam_label("z", "-", "comp.", prefix=r"\text{No} \,\; ").build().scale(0.5).next_to(
+            sz2_down_line, DOWN)
 
         ## Explaination Bit
-        sup = MathTex(r"|z,+\rangle", substrings_to_isolate=["z"], color=BLUE).move_to(
-            sz_up_text.get_center() + [0, 1, 0])
-        sup.set_color_by_tex("z", YELLOW)
+        sup = ket("z", "+").build().move_to(sz_up_text.get_center() + [0, 1, 0])
         sup.scale(0.6)
 
-        sdown = MathTex(r"|z,-\rangle", substrings_to_isolate=["z"], color=TEAL).move_to(
-            sz_down_text.get_center() + [0, -1, 0])
-        sdown.set_color_by_tex("z", YELLOW)
+        sdown = ket("z", "-").build().move_to(sz_down_text.get_center() + [0, -1, 0])
         sdown.scale(0.6)
 
-        # Create individual parts with different colors
-        part1 = MathTex(r"|z,-\rangle", color=TEAL, substrings_to_isolate=["z"])
-        part1.set_color_by_tex("z", YELLOW)
-        part2 = Tex(r" is blocked and only ")
-        part3 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"])
-        part3.set_color_by_tex("z", YELLOW)
-        part4 = Tex(r" is passed through second ")
-        part5 = Tex(r"$ SG\hat{z} $", color=YELLOW)
-        part6 = Tex(r" setup")
-
-        # Arrange them in a single line
-        sentence1 = VGroup(part1, part2, part3, part4, part5, part6).arrange(RIGHT)
-
-        sentence1.scale(0.6)
-        sentence1.shift(UP * 3)
-
-        part1 = Tex(r"We see only ")
-        part2 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"])
-        part2.set_color_by_tex("z", YELLOW)
-        part3 = Tex(r" state again")
-
-        sentence2 = VGroup(part1, part2, part3).arrange(RIGHT)
-        sentence2.scale(0.6)
-        sentence2.next_to(sentence1, DOWN)
-
-        part1 = MathTex(r"\Rightarrow |z,-\rangle", color=TEAL, substrings_to_isolate=["z", r"\Rightarrow"])
-        part1.set_color_by_tex("z", YELLOW)
-        part1.set_color_by_tex(r"\Rightarrow", WHITE)
-        part2 = Tex(r" has no component of ")
-        part3 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"])
-        part3.set_color_by_tex("z", YELLOW)
-
-        # Arrange them in a single line
-        sentence3 = VGroup(part1, part2, part3).arrange(RIGHT)
-        sentence3.scale(0.6)
-        sentence3.next_to(sentence2, DOWN)
-
         ## Playing out the animations
         self.play(DrawBorderThenFill(VGroup(grp1, SGz2)))
 
@@ -298,6 +285,19 @@ class fig1_3a(Scene):
 
         self.wait()
 
+        # Arrange the parts of each sentence in a single line
+        sentence1 = VGroup(*build_all(sentence1_parts)).arrange(RIGHT)
+        sentence1.scale(0.6)
+        sentence1.shift(UP * 3)
+
+        sentence2 = VGroup(*build_all(sentence2_parts)).arrange(RIGHT)
+        sentence2.scale(0.6)
+        sentence2.next_to(sentence1, DOWN)
+
+        sentence3 = VGroup(*build_all(sentence3_parts)).arrange(RIGHT)
+        sentence3.scale(0.6)
+        sentence3.next_to(sentence2, DOWN)
+
         self.play(Write(sup), Write(sdown))
         self.play(Write(sentence1))
         self.play(Write(sentence2))
@@ -308,14 +308,31 @@ class fig1_3a(Scene):
 
 class fig1_3b(Scene):
     def construct(self):
-        oven = create_textbox(color=RED, string="Oven", string_color=RED)
-        SGz = create_textbox(color=BLUE, string=r"SG\hat{z}", string_color=YELLOW)
+        # All text is declared first and compiled in the background while the geometry is built
+        silver_atoms_label = Fragment(MathTex, r"Ag\,Atoms", color=LIGHT_GRAY)
+        sentence1_parts = [Fragment(Tex, r"When the atoms in state "), ket("z", "+"),
+                           Fragment(Tex, r" are passed through a ")]
+        sentence2_parts = [Fragment(Tex, r"$SG\hat{x}$", color=GREEN),
+                           Fragment(Tex, r", we again see only two discrete outcomes.")]
+        sentence3_parts = [Fragment(Tex, r"But now the states should be represented differently, say "),
+                           ket("x", "+"), Fragment(Tex, r" and "), ket("x", "-", " .")]
+        sentence4_parts = [Fragment(Tex, r"This observation is like saying that "), ket("z", "+"),
+                           Fragment(Tex, r" states are also states ")]
+        sentence5_parts = [Fragment(Tex, r"with some amplitude along "), ket("x", "+"), Fragment(Tex, r" and "),
+                           ket("x", "-"), Fragment(Tex, r".")]
+        prefetch([
+            textbox_label("Oven", RED), textbox_label(r"SG\hat{z}", YELLOW), textbox_label(r"SG\hat{x}", GREEN),
+            beam_label("z", "+", "comp."), beam_label("z", "-", "comp."),
+            beam_label("x", "+", "comp."), beam_label("x", "-", "comp."), silver_atoms_label,
+            *sentence1_parts, *sentence2_parts, *sentence3_parts, *sentence4_parts, *sentence5_parts,
+        ])
+
+        oven = create_frame(color=RED)
+        SGz = create_frame(color=BLUE)
         grp1 = VGroup(oven, SGz).arrange(RIGHT, buff=1).to_edge(LEFT, buff=0.7)
-        SGx = create_textbox(color=PURPLE, string=r"SG\hat{x}", string_color=GREEN).shift(LEFT * 1).next_to(grp1, RIGHT,
-                                                                                                            buff=3)
+        SGx = create_frame(color=PURPLE).shift(LEFT * 1).next_to(grp1, RIGHT, buff=3)
 
         silver_beam = Line(oven.get_right(), SGz.get_left(), color=WHITE)
-        silver_atoms = MathTex(r"Ag\,Atoms", color=LIGHT_GRAY).scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
 
         spin_line_offset = 0.3
         sz_up_line = Line(SGz.get_right() + [0, spin_line_offset, 0], SGx.get_left() + [0, spin_line_offset, 0])
@@ -327,80 +344,23 @@ class fig1_3b(Scene):
         hatch1 = Hatch_lines(obsticle, angle=PI / 6, offset=0.1, stroke_width=2)
         hatch2 = Hatch_lines(obsticle, angle=PI / 6 + PI / 2, offset=0.1, stroke_width=2)
 
-        sz_up_text = MathTex(r"S_z+ comp.", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(
-            sz_up_line, UP)
-        sz_down_text = MathTex(r"S_z- comp.", substrings_to_isolate=["-", "z"], color=WHITE).scale(0.5).next_to(
-            sz_down_line, DOWN)
-        sz_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
-
         sx_up_line = Line(SGx.get_right() + [0, spin_line_offset, 0], SGx.get_right() + [2.5, spin_line_offset, 0])
         sx_down_line = Line(
             SGx.get_right() + [0, -spin_line_offset, 0],
             SGx.get_right() + [2.5, -spin_line_offset, 0],
         )
 
-        sx_up_text = MathTex(r"S_x+ comp.", substrings_to_isolate=["+", "x"], color=WHITE).scale(0.5).next_to(
-            sx_up_line, UP)
-        sx_down_text = MathTex(r"S_x- comp.", substrings_to_isolate=["-", "x"], color=WHITE).scale(0.5).next_to(
-            sx_down_line, DOWN)
-        sx_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("x", YELLOW)
-        sx_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("x", YELLOW)
-
-        ## Explaination Bit
-
-        # First part
-        part1_1 = Tex(r"When the atoms in state ")
-        part1_2 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"])
-        part1_2.set_color_by_tex("z", YELLOW)
-        part1_3 = Tex(r" are passed through a ")
+        # The geometry is done, from here on the text is taken from the prefetch
+        add_label(oven, "Oven", RED)
+        add_label(SGz, r"SG\hat{z}", YELLOW)
+        add_label(SGx, r"SG\hat{x}", GREEN)
+        silver_atoms = silver_atoms_label.build().scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
 
-        sentence1 = VGroup(part1_1, part1_2, part1_3).arrange(RIGHT)
-        sentence1.scale(0.6)
-        sentence1.shift(UP * 3)
+        sz_up_text = beam_label("z", "+", "comp.").build().scale(0.5).next_to(sz_up_line, UP)
+        sz_down_text = beam_label("z", "-", "comp.").build().scale(0.5).next_to(sz_down_line, DOWN)
 
-        # Second part
-        part2_1 = Tex(r"$SG\hat{x}$", color=GREEN)
-        part2_2 = Tex(r", we again see only two discrete outcomes.")
-
-        sentence2 = VGroup(part2_1, part2_2).arrange(RIGHT)
-        sentence2.scale(0.6)
-        sentence2.next_to(sentence1, DOWN)
-
-        # Third part
-        part3_1 = Tex(r"But now the states should be represented differently, say ")
-        part3_2 = MathTex(r"|x,+\rangle", color=BLUE, substrings_to_isolate=["x"])
-        part3_2.set_color_by_tex("x", YELLOW)
-        part3_3 = Tex(r" and ")
-        part3_4 = MathTex(r"|x,-\rangle .", color=TEAL, substrings_to_isolate=["x"])
-        part3_4.set_color_by_tex("x", YELLOW)
-
-        sentence3 = VGroup(part3_1, part3_2, part3_3, part3_4).arrange(RIGHT)
-        sentence3.scale(0.6)
-        sentence3.next_to(sentence2, DOWN)
-
-        # Fourth part
-        part4_1 = Tex(r"This observation is like saying that ")
-        part4_2 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"])
-        part4_2.set_color_by_tex("z", YELLOW)
-        part4_3 = Tex(r" states are also states ")
-
-        sentence4 = VGroup(part4_1, part4_2, part4_3).arrange(RIGHT)
-        sentence4.scale(0.6)
-        sentence4.next_to(sentence3, DOWN)
-
-        # Fifth part
-        part5_0 = Tex(r"with some amplitude along ")
-        part5_1 = MathTex(r"|x,+\rangle", color=BLUE, substrings_to_isolate=["x"])
-        part5_1.set_color_by_tex("x", YELLOW)
-        part5_2 = Tex(r" and ")
-        part5_3 = MathTex(r"|x,-\rangle", color=TEAL, substrings_to_isolate=["x"])
-        part5_3.set_color_by_tex("x", YELLOW)
-        part5_4 = Tex(r".")
-
-        sentence5 = VGroup(part5_0, part5_1, part5_2, part5_3, part5_4).arrange(RIGHT)
-        sentence5.scale(0.6)
-        sentence5.next_to(sentence4, DOWN)
+        sx_up_text = beam_label("x", "+", "comp.").build().scale(0.5).next_to(sx_up_line, UP)
+        sx_down_text = beam_label("x", "-", "comp.").build().scale(0.5).next_to(sx_down_line, DOWN)
 
         ## Playing out the animations
         self.play(DrawBorderThenFill(VGroup(grp1, SGx)))
@@ -431,6 +391,18 @@ class fig1_3b(Scene):
 
         self.play(VGroup(*[mob for mob in self.mobjects if isinstance(mob, VMobject)]).animate.shift(DOWN * 1.5))
 
+        ## Explaination Bit
+        sentences = VGroup()
+        for parts in [sentence1_parts, sentence2_parts, sentence3_parts, sentence4_parts, sentence5_parts]:
+            sentence = VGroup(*build_all(parts)).arrange(RIGHT)
+            sentence.scale(0.6)
+            if len(sentences) == 0:
+                sentence.shift(UP * 3)
+            else:
+                sentence.next_to(sentences[-1], DOWN)
+            sentences.add(sentence)
+        sentence1, sentence2, sentence3, sentence4, sentence5 = sentences
+
         self.play(Write(sentence1))
         self.play(Write(sentence2))
         self.play(Write(sentence3))
@@ -442,17 +414,37 @@ class fig1_3b(Scene):
 
 class fig1_3c(ZoomedScene):
     def construct(self):
+        # All text is declared first and compiled in the background while the geometry is built
+        silver_atoms_label = Fragment(Tex, r"Ag\\Atoms", color=LIGHT_GRAY)
+        sentence1_parts = [Fragment(Tex, r"When atoms in state "), ket("x", "+"), Fragment(Tex, r" go through "),
+                           Fragment(MathTex, r"SG_z", isolate=["z"], colors={"z": YELLOW})]
+        sentence2_label = Fragment(Tex, r"we see equal number of atoms with states ")
+        sentence3_parts = [ket("z", "+"), Fragment(Tex, " and "), ket("z", "-")]
+        sen1_label = Fragment(Tex, r"This is weird.")
+        sen2_parts = [Fragment(Tex, r"Classically we would only except a "), ket("z", "+"), Fragment(Tex, r" beam")]
+        sen3_parts = [Fragment(Tex, r"as the "), ket("z", "-"), Fragment(Tex, " beam was earlier blocked.")]
+        s1_parts = [Fragment(Tex, r"There is no memory of the first filter "),
+                    Fragment(MathTex, r"SG_z", isolate=["z"], color=YELLOW)]
+        s2_parts = [Fragment(Tex, r"and the particles coming from the second machine "),
+                    Fragment(MathTex, r"SG_x", isolate=["x"], color=YELLOW), Fragment(Tex, r" are not anymore "),
+                    Fragment(MathTex, r"|z,+\rangle", isolate=["z", "+"], colors={"z": YELLOW}, color=BLUE)]
+        prefetch([
+            textbox_label("Oven", RED), textbox_label(r"SG\hat{z}", YELLOW), textbox_label(r"SG\hat{x}", GREEN),
+            beam_label("z", "+", "beam"), beam_label("z", "-", "beam"),
+            beam_label("x", "+", "beam"), beam_label("x", "-", "beam"),
+            silver_atoms_label, sentence2_label, sen1_label,
+            *sentence1_parts, *sentence3_parts, *sen2_parts, *sen3_parts, *s1_parts, *s2_parts,
+        ])
+
         # Define 4 boxes: oven, SGz, SGx, SGz2
-        oven = create_textbox(color=RED, string="Oven", string_color=RED)
-        SGz = create_textbox(color=BLUE, string=r"SG\hat{z}", string_color=YELLOW)
+        oven = create_frame(color=RED)
+        SGz = create_frame(color=BLUE)
         grp1 = VGroup(oven, SGz).arrange(RIGHT, buff=0.7).to_edge(LEFT, buff=0.5)
-        SGx = create_textbox(color=PURPLE, string=r"SG\hat{x}", string_color=GREEN).shift(LEFT * 1).next_to(grp1, RIGHT,
-                                                                                                            buff=1.5)
-        SGz2 = create_textbox(color=BLUE, string=r"SG\hat{z}", string_color=YELLOW).next_to(SGx, buff=1.5)
+        SGx = create_frame(color=PURPLE).shift(LEFT * 1).next_to(grp1, RIGHT, buff=1.5)
+        SGz2 = create_frame(color=BLUE).next_to(SGx, buff=1.5)
 
         # Silver Beam - Oven to SGz
         silver_beam = Line(oven.get_right(), SGz.get_left(), color=WHITE)
-        silver_atoms = Tex(r"Ag\\Atoms", color=LIGHT_GRAY).scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
 
         # Spin Lines - SGz to SGx
         spin_line_offset = 0.3
@@ -465,13 +457,6 @@ class fig1_3c(ZoomedScene):
         hatch1 = Hatch_lines(obsticle, angle=PI / 6, offset=0.1, stroke_width=2)
         hatch2 = Hatch_lines(obsticle, angle=PI / 6 + PI / 2, offset=0.1, stroke_width=2)
 
-        sz_up_text = MathTex(r"S_z+ beam", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(sz_up_line,
-                                                                                                             UP)
-        sz_down_text = MathTex(r"S_z- beam", substrings_to_isolate=["-", "z"], color=WHITE).scale(0.5).next_to(obsticle,
-                                                                                                               DOWN)
-        sz_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
-
         # Spin Lines - SGx to SGz2
         sx_up_line = Line(SGx.get_right() + [0, spin_line_offset, 0], SGz2.get_left() + [0, spin_line_offset, 0])
         sx_down_line = Line(SGx.get_right() + [0, -spin_line_offset, 0],
@@ -482,25 +467,27 @@ class fig1_3c(ZoomedScene):
         hatch1_2 = Hatch_lines(obsticle2, angle=PI / 6, offset=0.1, stroke_width=2)
         hatch2_2 = Hatch_lines(obsticle2, angle=PI / 6 + PI / 2, offset=0.1, stroke_width=2)
 
-        sx_up_text = MathTex(r"S_x+ beam", substrings_to_isolate=["+", "x"], color=WHITE).scale(0.5).next_to(sx_up_line,
-                                                                                                             UP)
-        sx_down_text = MathTex(r"S_x- beam", substrings_to_isolate=["-", "x"], color=WHITE).scale(0.5).next_to(
-            obsticle2, DOWN)
-        sx_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("x", YELLOW)
-        sx_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("x", YELLOW)
-
         # Spin lines SGz2 to detector
 
         sz2_up_line = Line(SGz2.get_right() + [0, spin_line_offset, 0], SGz2.get_right() + [0.3, spin_line_offset, 0])
         sz2_down_line = Line(SGz2.get_right() + [0, -spin_line_offset, 0],
                              SGz2.get_right() + [0.3, -spin_line_offset, 0])
 
-        sz2_up_text = MathTex(r"S_z+ beam", substrings_to_isolate=["+", "z"], color=WHITE).scale(0.5).next_to(
-            sz2_up_line, RIGHT, buff=0.1)
-        sz2_down_text = MathTex(r"S_z- beam", substrings_to_isolate=["-", "z"], color=WHITE).scale(0.5).next_to(
-            sz2_down_line, RIGHT, buff=0.1)
-        sz2_up_text.set_color_by_tex("+", BLUE).set_color_by_tex("z", YELLOW)
-        sz2_down_text.set_color_by_tex("-", TEAL).set_color_by_tex("z", YELLOW)
+        # The geometry is done, from here on the text is taken from the prefetch
+        add_label(oven, "Oven", RED)
+        add_label(SGz, r"SG\hat{z}", YELLOW)
+        add_label(SGx, r"SG\hat{x}", GREEN)
+        add_label(SGz2, r"SG\hat{z}", YELLOW)
+        silver_atoms = silver_atoms_label.build().scale(0.3).next_to(silver_beam, DOWN, buff=0.2)
+
+        sz_up_text = beam_label("z", "+", "beam").build().scale(0.5).next_to(sz_up_line, UP)
+        sz_down_text = beam_label("z", "-", "beam").build().scale(0.5).next_to(obsticle, DOWN)
+
+        sx_up_text = beam_label("x", "+", "beam").build().scale(0.5).next_to(sx_up_line, UP)
+        sx_down_text = beam_label("x", "-", "beam").build().scale(0.5).next_to(obsticle2, DOWN)
+
+        sz2_up_text = beam_label("z", "+", "beam").build().scale(0.5).next_to(sz2_up_line, RIGHT, buff=0.1)
+        sz2_down_text = beam_label("z", "-", "beam").build().scale(0.5).next_to(sz2_down_line, RIGHT, buff=0.1)
 
         # Brace 
         focus_group = VGroup(SGx, SGz2, sz2_up_text)
@@ -508,46 +495,25 @@ class fig1_3c(ZoomedScene):
 
         ## EXPLAINATION 
 
-        part1 = Tex(r"When atoms in state ")
-        part2 = MathTex(r"|x,+\rangle", color=BLUE, substrings_to_isolate=["x"]).set_color_by_tex("x", YELLOW)
-        part3 = Tex(r" go through ")
-        part4 = MathTex(r"SG_z", substrings_to_isolate=["z"]).set_color_by_tex("z", YELLOW)
-        sentence1 = VGroup(part1, part2, part3, part4).arrange(RIGHT).scale(0.6)
+        sentence1 = VGroup(*build_all(sentence1_parts)).arrange(RIGHT).scale(0.6)
         sentence1.next_to(brace, DOWN, buff=0.5)
 
-        sentence2 = Tex(r"we see equal number of atoms with states ").next_to(sentence1, DOWN).scale(0.6)
+        sentence2 = sentence2_label.build().next_to(sentence1, DOWN).scale(0.6)
 
-        part1 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"]).set_color_by_tex("z", YELLOW)
-        part2 = Tex(" and ")
-        part3 = MathTex(r"|z,-\rangle", color=TEAL, substrings_to_isolate=["z"]).set_color_by_tex("z", YELLOW)
-        sentence3 = VGroup(part1, part2, part3).arrange(RIGHT).scale(0.6)
+        sentence3 = VGroup(*build_all(sentence3_parts)).arrange(RIGHT).scale(0.6)
         sentence3.next_to(sentence2, DOWN)
 
         brace2 = Brace(VGroup(sentence1, sentence2, sentence3), LEFT, color=RED)
 
-        sen1 = Tex(r"This is weird.").scale(0.6).align_to(brace2, UP).shift(LEFT * 3.5)
+        sen1 = sen1_label.build().scale(0.6).align_to(brace2, UP).shift(LEFT * 3.5)
         sen1.set_color_by_gradient(BLUE, LIGHT_BROWN)
 
-        part1 = Tex(r"Classically we would only except a ")
-        part2 = MathTex(r"|z,+\rangle", color=BLUE, substrings_to_isolate=["z"]).set_color_by_tex("z", YELLOW)
-        part3 = Tex(r" beam")
-        sen2 = VGroup(part1, part2, part3).arrange(RIGHT).scale(0.6).next_to(sen1, DOWN)
-
-        part1 = Tex(r"as the ")
-        part2 = MathTex(r"|z,-\rangle", color=TEAL, substrings_to_isolate=["z"]).set_color_by_tex("z", YELLOW)
-        part3 = Tex(" beam was earlier blocked.")
-        sen3 = VGroup(part1, part2, part3).arrange(RIGHT).scale(0.6).next_to(sen2, DOWN)
-
-        part1 = Tex(r"There is no memory of the first filter ")
-        part2 = MathTex(r"SG_z", substrings_to_isolate=["z"], color=YELLOW)
-        s1 = VGroup(part1, part2).arrange(RIGHT)
+        sen2 = VGroup(*build_all(sen2_parts)).arrange(RIGHT).scale(0.6).next_to(sen1, DOWN)
 
-        part3 = Tex(r"and the particles coming from the second machine ")
-        part4 = MathTex(r"SG_x", substrings_to_isolate=["x"], color=YELLOW)
-        part5 = Tex(r" are not anymore ")
-        part6 = MathTex(r"|z,+\rangle", substrings_to_isolate=["z", "+"], color=BLUE).set_color_by_tex("z", YELLOW)
+        sen3 = VGroup(*build_all(sen3_parts)).arrange(RIGHT).scale(0.6).next_to(sen2, DOWN)
 
-        s2 = VGroup(part3, part4, part5, part6).arrange(RIGHT)
+        s1 = VGroup(*build_all(s1_parts)).arrange(RIGHT)
+        s2 = VGroup(*build_all(s2_parts)).arrange(RIGHT)
 
         last_line = VGroup(s1, s2).arrange(DOWN).scale(0.6).move_to(ORIGIN).shift(DOWN * 4.5)
 
@@ -0,0 +1,85 @@
+from manim import *
+from manim.camera.camera import Camera
+import numpy as np
+
+
+class AtomCloud(PMobject):
+    """Many identical round atoms drawn as one point cloud.
+
+    Only the (N, 3) centers, one radius and a color index per atom are stored,
+    rgbas is the (C, 4) palette the indices point into. The camera stamps a
+    filled disc at every center in one vectorized pass, so moving or drawing
+    the cloud costs the same per atom no matter how many there are, and
+    there are no per-atom submobjects, point arrays or styles.
+
+    The discs are drawn by AtomCloudCamera, scenes showing a cloud pass it
+    as their camera_class. A plain Camera draws the centers as pixels.
+    """
+
+    # Atoms drawn per stamping pass, bounds the size of the temporary pixel index arrays
+    CHUNK = 4096
+
+    def __init__(self, centers: np.array, radius: float = DEFAULT_DOT_RADIUS, colors=(WHITE,),
+                 color_index: np.array = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.radius = radius
+        self.rgbas = np.array([color_to_rgba(color) for color in colors])
+        self.color_index = np.zeros(0, dtype=np.int64)
+        self.set_centers(centers)
+        if color_index is not None:
+            self.set_color_index(color_index)
+
+    def get_array_attrs(self) -> list:
+        # The palette doesn't have one row per point, so only the centers are aligned and interpolated
+        return ["points"]
+
+    def set_centers(self, centers: np.array) -> 'AtomCloud':
+        centers = np.asarray(centers, dtype=np.float64)
+        if centers.shape[1] == 2:
+            centers = np.column_stack((centers, np.zeros(len(centers))))
+        # Copied, the centers usually are a simulation's own positions array
+        if self.points.shape == centers.shape:
+            self.points[:] = centers
+        else:
+            self.points = centers.copy()
+        if len(self.color_index) != len(centers):
+            # Atoms that are still there keep their colors, new ones get the first
+            color_index = np.zeros(len(centers), dtype=np.int64)
+            kept = min(len(centers), len(self.color_index))
+            color_index[:kept] = self.color_index[:kept]
+            self.color_index = color_index
+        return self
+
+    def set_color_index(self, color_index: np.array) -> 'AtomCloud':
+        self.color_index[:] = color_index
+        return self
+
+    def display(self, camera: Camera, pixel_array: np.array) -> None:
+        radius = self.radius * camera.pixel_width / camera.frame_width
+        span = np.arange(-int(np.ceil(radius)), int(np.ceil(radius)) + 1)
+        dx, dy = np.meshgrid(span, span)
+        inside = dx * dx + dy * dy <= radius * radius
+        disc = np.column_stack((dx[inside], dy[inside]))
+
+        colors = (camera.rgb_max_val * self.rgbas).astype(camera.pixel_array_dtype)
+        flat = pixel_array.reshape((camera.pixel_height * camera.pixel_width, pixel_array.shape[2]))
+        centers = camera.points_to_pixel_coords(self, self.points)
+
+        for start in range(0, len(centers), self.CHUNK):
+            coords = (centers[start:start + self.CHUNK, None, :] + disc[None]).reshape(-1, 2)
+            color = np.repeat(colors[self.color_index[start:start + self.CHUNK]], len(disc), axis=0)
+            on_screen = camera.on_screen_pixels(coords)
+            flat[coords[on_screen, 1] * camera.pixel_width + coords[on_screen, 0]] = color[on_screen]
+
+        if not np.shares_memory(flat, pixel_array):
+            pixel_array[:, :] = flat.reshape(pixel_array.shape)
+
+
+class AtomCloudCamera(Camera):
+    """Camera that lets AtomClouds draw their round atoms, every other point cloud is drawn as usual."""
+
+    def display_point_cloud(self, pmobject, points, rgbas, thickness, pixel_array) -> None:
+        if isinstance(pmobject, AtomCloud):
+            pmobject.display(self, pixel_array)
+        else:
+            super().display_point_cloud(pmobject, points, rgbas, thickness, pixel_array)
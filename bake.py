@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from typing import Callable
+
+# Baked trajectories are cached here, relative to where manim is run from
+BAKE_DIR = "baked"
+# Fixed physics timestep of every bake, independent of the render frame rate
+BAKE_DT = 1 / 60
+
+
+def bake_key(params: dict) -> str:
+    """Returns a short hash of the simulation parameters (seed, N, radii, speed, dt, ...)."""
+    text = json.dumps(params, sort_keys=True, default=repr)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def bake(make_system: Callable, params: dict, duration: float, dt: float = BAKE_DT,
+         directory: str = BAKE_DIR) -> np.memmap:
+    """Runs a simulation headless at a fixed timestep and stores the positions.
+
+    make_system builds a fresh system with step(dt) and positions() from the
+    given params. The result is a read-only memmap of shape (frames, N, 2)
+    saved as .npy, so a re-render with the same parameters skips the physics
+    and only reads the frames it plays back. The key also holds the system's
+    name and its bakeVersion attribute, so changed physics never replays an
+    old bake.
+    """
+    frames = int(np.ceil(duration / dt)) + 1
+    key = bake_key(dict(params, dt=dt, frames=frames, system=getattr(make_system, "__qualname__", repr(make_system)),
+                        version=getattr(make_system, "bakeVersion", 1)))
+    path = os.path.join(directory, f"{key}.npy")
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+
+    os.makedirs(directory, exist_ok=True)
+    system = make_system(**params)
+    positions = np.asarray(system.positions())
+    tmp_path = os.path.join(directory, f"{key}.{os.getpid()}.tmp.npy")
+    trajectory = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64,
+                                           shape=(frames, len(positions), 2))
+
+    trajectory[0] = positions[:, :2]
+    for frame in range(1, frames):
+        system.step(dt)
+        trajectory[frame] = np.asarray(system.positions())[:, :2]
+
+    trajectory.flush()
+    del trajectory
+    # Only publish complete bakes, so a killed render never leaves a truncated file behind
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+class TrajectoryPlayback:
+    """Plays a baked trajectory back through the same step(dt) / positions()
+    interface as a live simulation.
+
+    Positions are linearly interpolated between the two baked frames around
+    the current time, so the playback frame rate doesn't have to match the
+    bake timestep. After the last frame the atoms stay where they are.
+    """
+
+    def __init__(self, trajectory: np.array, dt: float = BAKE_DT) -> None:
+        self.trajectory = trajectory
+        self.dt = dt
+        self.time = 0.0
+
+    def step(self, dt) -> None:
+        self.time += dt
+
+    def positions(self) -> np.array:
+        lastFrame = len(self.trajectory) - 1
+        frame = min(self.time / self.dt, lastFrame)
+        before = int(np.floor(frame))
+        after = min(before + 1, lastFrame)
+        alpha = frame - before
+        return (1 - alpha) * self.trajectory[before] + alpha * self.trajectory[after]
+
+
+class FixedTimestep:
+    """Runs a live simulation at a fixed internal timestep, whatever the frame rate.
+
+    step(dt) advances the scene time and runs as many dt-sized sub-steps as
+    it takes for the simulation to reach it, so a 15 fps preview and a 60 fps
+    render step the physics exactly the same way, and the same way bake does.
+    positions() interpolates between the last two sub-steps like
+    TrajectoryPlayback does between baked frames.
+
+    If the sub-steps of one frame take longer than budget seconds of wall
+    time, the rest is carried over to the next frames instead of dropped, so
+    the cost per frame stays bounded and the trajectory is unchanged, only
+    briefly behind.
+    """
+
+    def __init__(self, system, dt: float = BAKE_DT, budget: float = None) -> None:
+        self.system = system
+        self.dt = dt
+        self.budget = budget
+        self.time = 0.0
+        self.steps = 0
+        self.previous = np.array(system.positions(), dtype=np.float64)
+        self.current = self.previous.copy()
+
+    def step(self, dt) -> None:
+        self.time += dt
+        start = time.perf_counter()
+        while self.steps < self.time / self.dt:
+            self.system.step(self.dt)
+            self.steps += 1
+            self.previous, self.current = self.current, self.previous
+            self.current[:] = self.system.positions()
+            # At least one sub-step per frame, so a tight budget still makes progress
+            if self.budget is not None and time.perf_counter() - start > self.budget:
+                break
+
+    def positions(self) -> np.array:
+        alpha = min(self.time / self.dt - (self.steps - 1), 1)
+        return (1 - alpha) * self.previous + alpha * self.current
@@ -0,0 +1,47 @@
+from manim import *
+from tex_cache import Fragment
+from typing import Callable, Sequence
+
+# Fully built components, keyed by kind and the parameters they were built from
+_prototypes = {}
+
+
+def component(kind: str, parameters: Sequence, create: Callable[[], Mobject]) -> Mobject:
+    """Calls create() once per kind and parameters and returns copies of the result.
+
+    Parameters are compared by their str(), so colors and rounded point
+    tuples can be used as they are.
+    """
+    key = (kind, *(str(parameter) for parameter in parameters))
+    if key not in _prototypes:
+        _prototypes[key] = create()
+    return _prototypes[key].copy()
+
+
+def point_key(point: np.array) -> tuple:
+    # Geometry built from points that differ only by float noise is the same component
+    return tuple(np.round(point, 6))
+
+
+def frame(color, height=1, width=2) -> VGroup:
+    """The box of a textbox without its label, so it can be laid out before any text is built."""
+    def create():
+        box = Rectangle(  # create a box
+            height=height, width=width, fill_color=color,
+            fill_opacity=0.2, stroke_color=color
+        )
+        return VGroup(box)
+
+    return component("frame", (color, height, width), create)
+
+
+def add_label(box: VGroup, string, string_color, label=MathTex) -> VGroup:
+    """Puts a label in the middle of a frame, label is MathTex, Tex or Text."""
+    text = Fragment(label, string, color=string_color).build().scale(0.7).move_to(box[0].get_center())  # create text
+    return box.add(text)
+
+
+def textbox(color, string, string_color, height=1, width=2, label=MathTex) -> VGroup:
+    """A filled box with a label in the middle, label is MathTex, Tex or Text."""
+    return component("textbox", (color, string, string_color, height, width, label.__name__),
+                     lambda: add_label(frame(color, height, width), string, string_color, label))
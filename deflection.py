@@ -0,0 +1,107 @@
+import numpy as np
+from typing import Dict, Hashable, Sequence
+from field import PolePair, sg_magnet
+from trajectories import TrajectoryLibrary
+
+# Integrated beams, keyed by magnet, spins, speed and length
+_cache: Dict[Hashable, TrajectoryLibrary] = {}
+
+
+class GradientMagnet:
+    """The SG magnet as the beam sees it: along x the atoms cross the magnet
+    between start and end, along y they feel the gradient of |B| of the
+    magnet's cross section (a field.PolePair).
+
+    An atom with spin projection s gets the acceleration s * dB/dy, scaled so
+    that s = 1 on the beam axis gets acceleration. Off axis the force follows
+    the field model, so it is stronger near the knife edge. Atoms outside the
+    gap feel the gradient at its edge.
+    """
+
+    def __init__(self, poles: PolePair = None, start: float = 2.5, end: float = 4.75, acceleration: float = 2.45,
+                 height: float = 0.0, crossSectionScale: float = 0.25) -> None:
+        self.poles = poles or sg_magnet()
+        self.start = start
+        self.end = end
+        self.height = height
+        # Beam heights times crossSectionScale are heights in the cross section, whose gap is about 1 high
+        self.crossSectionScale = crossSectionScale
+        # The gradient only depends on the height, so it is tabulated once across the gap and interpolated
+        self.heights = np.linspace(-0.49, 0.49, 2049)
+        self.gradients = self.gradient(self.heights)
+        self.scale = acceleration / self.gradient(np.zeros(1))[0]
+        self.key = ("GradientMagnet", self.poles.key, start, end, acceleration, height, crossSectionScale)
+
+    def gradient(self, y: np.array, h: float = 1e-4) -> np.array:
+        """d|B|/dy at cross section height y, central differences for all heights at once."""
+        points = np.zeros((2 * len(y), 3))
+        points[:len(y), 1] = y + h
+        points[len(y):, 1] = y - h
+        b = np.linalg.norm(self.poles.field(points), axis=1)
+        return (b[:len(y)] - b[len(y):]) / (2 * h)
+
+    def acceleration(self, positions: np.array, spins: np.array) -> np.array:
+        """(N, 3) accelerations of atoms at (N, 3) positions with (N,) spin projections."""
+        acceleration = np.zeros_like(positions)
+        inside = (positions[:, 0] >= self.start) & (positions[:, 0] <= self.end)
+        if inside.any():
+            y = (positions[inside, 1] - self.height) * self.crossSectionScale
+            acceleration[inside, 1] = spins[inside] * self.scale * np.interp(y, self.heights, self.gradients)
+        return acceleration
+
+
+def integrate(positions: np.array, velocities: np.array, spins: np.array, magnet: GradientMagnet,
+              duration: float, dt: float = 1 / 120) -> np.array:
+    """Moves all atoms through the magnet together with velocity Verlet.
+
+    positions and velocities are (N, 3), spins is (N,). Returns the (S, N, 3)
+    positions of every atom at S evenly spaced times from 0 to duration.
+    """
+    steps = max(1, int(np.ceil(duration / dt)))
+    dt = duration / steps
+    position = np.array(positions, dtype=np.float64)
+    velocity = np.array(velocities, dtype=np.float64)
+    spins = np.asarray(spins, dtype=np.float64)
+
+    trajectories = np.empty((steps + 1, len(position), 3))
+    trajectories[0] = position
+    acceleration = magnet.acceleration(position, spins)
+    for i in range(1, steps + 1):
+        position += velocity * dt + 0.5 * acceleration * dt * dt
+        newAcceleration = magnet.acceleration(position, spins)
+        velocity += 0.5 * (acceleration + newAcceleration) * dt
+        acceleration = newAcceleration
+        trajectories[i] = position
+    return trajectories
+
+
+def thermal_beam(numAtoms: int, speed: float, speedSpread: float = 0.1, width: float = 0.0,
+                 seed: int = None) -> tuple:
+    """(positions, velocities, spins) of atoms leaving the oven along +x.
+
+    Speeds are normal around speed with relative spread speedSpread, heights
+    are uniform in [-width / 2, width / 2] and spins are up or down at random.
+    """
+    rng = np.random.default_rng(seed)
+    positions = np.zeros((numAtoms, 3))
+    positions[:, 1] = rng.uniform(-width / 2, width / 2, numAtoms)
+    velocities = np.zeros((numAtoms, 3))
+    velocities[:, 0] = speed * np.maximum(1 + speedSpread * rng.standard_normal(numAtoms), 0.1)
+    spins = rng.choice([-1.0, 1.0], numAtoms)
+    return positions, velocities, spins
+
+
+def deflection_library(spins: Sequence[float], speed: float, length: float, magnet: GradientMagnet = None,
+                       dt: float = 1 / 120) -> TrajectoryLibrary:
+    """Curves of atoms starting at the origin along +x at speed with the given
+    spin projections, until they are length along x. Integrated once per
+    magnet, spins, speed and length, the library's parameters are the spins.
+    """
+    magnet = magnet or GradientMagnet()
+    key = (magnet.key, tuple(spins), speed, length, dt)
+    if key not in _cache:
+        velocities = np.zeros((len(spins), 3))
+        velocities[:, 0] = speed
+        trajectories = integrate(np.zeros((len(spins), 3)), velocities, spins, magnet, length / speed, dt)
+        _cache[key] = TrajectoryLibrary(trajectories.transpose(1, 0, 2), spins)
+    return _cache[key]
@@ -0,0 +1,51 @@
+from manim import *
+import numpy as np
+
+
+class DetectorScreen(VGroup):
+    """Screen that accumulates atom impacts in a fixed grid of bins.
+
+    Impacts are binned with np.bincount into self.counts and only the cells
+    whose count changed get a new fill opacity, so streaming more hits costs
+    the same per frame no matter how many have landed already. A cell is fully
+    lit once it holds saturation hits.
+    """
+
+    def __init__(self, height=3, width=1, rows=60, columns=8, color=WHITE, saturation=50, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.columns = columns
+        self.saturation = saturation
+        self.counts = np.zeros((rows, columns), dtype=np.int64)
+
+        self.frame = Rectangle(height=height, width=width, color=DARK_GRAY, fill_opacity=0.5)
+        self.cells = VGroup(*[
+            Rectangle(height=height / rows, width=width / columns, stroke_width=0, fill_color=color, fill_opacity=0)
+            for _ in range(rows * columns)
+        ]).arrange_in_grid(rows, columns, buff=0).move_to(self.frame)
+        self.add(self.frame, self.cells)
+
+    def add_impacts(self, points: np.array) -> None:
+        """Adds an (M, 2) or (M, 3) array of impact points in scene coordinates.
+        Points outside the screen are ignored.
+        """
+        points = np.asarray(points)
+        if len(points) == 0:
+            return
+
+        top_left = self.frame.get_corner(UL)
+        column = np.floor((points[:, 0] - top_left[0]) / self.frame.width * self.columns).astype(np.int64)
+        row = np.floor((top_left[1] - points[:, 1]) / self.frame.height * self.rows).astype(np.int64)
+        inside = (column >= 0) & (column < self.columns) & (row >= 0) & (row < self.rows)
+
+        hits = np.bincount(row[inside] * self.columns + column[inside], minlength=self.rows * self.columns)
+        counts = self.counts.reshape(-1)
+
+        # Saturated cells look the same however many more hits they get
+        changed = np.flatnonzero(hits)
+        changed = changed[counts[changed] < self.saturation]
+        counts += hits
+
+        opacity = np.minimum(counts[changed] / self.saturation, 1)
+        for index, cell_opacity in zip(changed, opacity):
+            self.cells[index].set_fill(opacity=cell_opacity)
@@ -0,0 +1,175 @@
+import numpy as np
+from typing import Dict, Hashable, List, Sequence
+
+# Traced field lines, keyed by magnet geometry and tracing parameters
+_cache: Dict[Hashable, List[np.array]] = {}
+
+
+def as_points(points) -> np.array:
+    # (N, 2) or (N, 3) in, (N, 3) out
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[-1] == 2:
+        points = np.concatenate((points, np.zeros(points.shape[:-1] + (1,))), axis=-1)
+    return points
+
+
+class PolePair:
+    """Cross section of two long pole pieces, like the SG magnet seen along the beam.
+
+    Each pole is a polygon whose outline carries a uniform magnetic surface
+    charge, positive on the north pole and negative on the south pole. The
+    magnets are long compared to the gap, so the field in the xy plane is
+    the 2D one, B ~ r / |r|^2 per unit of charge, which integrates in closed
+    form along every straight edge of the outlines.
+    """
+
+    def __init__(self, north: np.array, south: np.array, strength: float = 1.0) -> None:
+        self.north = as_points(north)
+        self.south = as_points(south)
+        self.strength = strength
+
+        # Edges as complex numbers a -> b, a point x + iy of the plane is then z and r / |r|^2 is 1 / conj(z - c)
+        starts, ends, weights = [], [], []
+        for polygon, sign in ((self.north, 1), (self.south, -1)):
+            z = polygon[:, 0] + 1j * polygon[:, 1]
+            starts.append(z)
+            ends.append(np.roll(z, -1))
+            edge = np.abs(ends[-1] - starts[-1])
+            # Charge per unit length, the same on every edge of the pole
+            weights.append(np.full(len(z), sign * strength / edge.sum()))
+        self.starts, self.ends = np.concatenate(starts), np.concatenate(ends)
+        direction = (self.ends - self.starts) / np.abs(self.ends - self.starts)
+        self.edgeWeights = -np.concatenate(weights) / direction / (2 * np.pi)
+        self.key = ("PolePair", self.north.tobytes(), self.south.tobytes(), strength)
+
+    @staticmethod
+    def outline(polygon: np.array, count: int) -> np.array:
+        """count points spread evenly along the closed outline of polygon."""
+        closed = np.concatenate((polygon, polygon[:1]))
+        length = np.concatenate(([0], np.cumsum(np.linalg.norm(np.diff(closed, axis=0), axis=1))))
+        s = (np.arange(count) + 0.5) / count * length[-1]
+        index = np.searchsorted(length, s, "right") - 1
+        alpha = ((s - length[index]) / (length[index + 1] - length[index]))[:, None]
+        return (1 - alpha) * closed[index] + alpha * closed[index + 1]
+
+    def field(self, points: np.array) -> np.array:
+        """B at (N, 3) points, summed over all edges at once."""
+        z = points[:, 0, None] + 1j * points[:, 1, None]
+        # Integral of 1 / (z - c) over an edge from a to b is -log((z - b) / (z - a)) / direction
+        b = np.conj(np.log((z - self.ends) / (z - self.starts)) @ self.edgeWeights)
+        return np.column_stack((b.real, b.imag, np.zeros(len(points))))
+
+    def stops(self, points: np.array) -> np.array:
+        """True for points that reached the inside of either pole."""
+        return inside_polygon(points, self.north) | inside_polygon(points, self.south)
+
+    def seeds(self, count: int, offset: float = 0.02) -> np.array:
+        """count starting points just outside the north pole's outline."""
+        points = self.outline(self.north, count)
+        return points + offset * outward_normals(self.north, count)
+
+
+class Dipole:
+    """Point dipole with moment m at center, stopped at a sphere of the given radius."""
+
+    def __init__(self, center=(0, 0, 0), moment=(0, 1, 0), radius: float = 0.25) -> None:
+        self.center = np.asarray(center, dtype=np.float64)
+        self.moment = np.asarray(moment, dtype=np.float64)
+        self.radius = radius
+        self.key = ("Dipole", tuple(self.center), tuple(self.moment), radius)
+
+    def field(self, points: np.array) -> np.array:
+        r = points - self.center
+        distance = np.maximum(np.linalg.norm(r, axis=1), 1e-12)[:, None]
+        unit = r / distance
+        return (3 * unit * (unit @ self.moment)[:, None] - self.moment) / distance ** 3 / (4 * np.pi)
+
+    def stops(self, points: np.array) -> np.array:
+        return np.linalg.norm(points - self.center, axis=1) < self.radius
+
+    def seeds(self, count: int, offset: float = 0.02) -> np.array:
+        """count points in the xy plane on the half of the sphere the field leaves from."""
+        axis = np.arctan2(self.moment[1], self.moment[0])
+        angle = axis + np.linspace(-np.pi / 2, np.pi / 2, count + 2)[1:-1]
+        direction = np.column_stack((np.cos(angle), np.sin(angle), np.zeros(count)))
+        return self.center + (self.radius + offset) * direction
+
+
+def inside_polygon(points: np.array, polygon: np.array) -> np.array:
+    """Even-odd test of (N, 3) points against one polygon, all edges at once."""
+    x, y = points[:, 0, None], points[:, 1, None]
+    start, end = polygon[:, :2], np.roll(polygon[:, :2], -1, axis=0)
+    crosses = (start[:, 1] > y) != (end[:, 1] > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xCross = start[:, 0] + (y - start[:, 1]) * (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+    return np.count_nonzero(crosses & (x < xCross), axis=1) % 2 == 1
+
+
+def outward_normals(polygon: np.array, count: int) -> np.array:
+    """Unit normals pointing out of polygon at the points PolePair.outline gives."""
+    closed = np.concatenate((polygon, polygon[:1]))
+    edges = np.diff(closed, axis=0)
+    length = np.concatenate(([0], np.cumsum(np.linalg.norm(edges, axis=1))))
+    s = (np.arange(count) + 0.5) / count * length[-1]
+    edge = edges[np.searchsorted(length, s, "right") - 1]
+    # Counter-clockwise outlines have the outside on the right of every edge
+    area = np.sum(closed[:-1, 0] * closed[1:, 1] - closed[1:, 0] * closed[:-1, 1])
+    normal = np.column_stack((edge[:, 1], -edge[:, 0], np.zeros(count))) * np.sign(area)
+    return normal / np.linalg.norm(normal, axis=1)[:, None]
+
+
+def streamlines(magnet, seeds: np.array, step: float = 0.08, maxSteps: int = 400,
+                bounds: Sequence[float] = (-7.5, 7.5, -4.5, 4.5)) -> List[np.array]:
+    """Traces a field line from every seed with RK4, all lines advancing together.
+
+    Lines follow the direction of B with fixed arc length steps and stop when
+    they enter a pole (magnet.stops) or leave bounds (x_min, x_max, y_min, y_max).
+    Returns one (S, 3) array of points per seed.
+    """
+    def direction(points):
+        b = magnet.field(points)
+        return b / np.maximum(np.linalg.norm(b, axis=1), 1e-12)[:, None]
+
+    seeds = as_points(seeds)
+    lines = np.full((maxSteps + 1, len(seeds), 3), np.nan)
+    lines[0] = seeds
+    lengths = np.full(len(seeds), maxSteps + 1)
+    active = np.arange(len(seeds))
+    points = seeds.copy()
+    x_min, x_max, y_min, y_max = bounds
+
+    for i in range(1, maxSteps + 1):
+        k1 = direction(points)
+        k2 = direction(points + step / 2 * k1)
+        k3 = direction(points + step / 2 * k2)
+        k4 = direction(points + step * k3)
+        points = points + step / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        lines[i, active] = points
+
+        stopped = magnet.stops(points) | (points[:, 0] < x_min) | (points[:, 0] > x_max) | \
+            (points[:, 1] < y_min) | (points[:, 1] > y_max)
+        if stopped.any():
+            # The point that stopped a line is its last one, the others keep going
+            lengths[active[stopped]] = i + 1
+            active, points = active[~stopped], points[~stopped]
+            if len(active) == 0:
+                break
+
+    return [lines[:lengths[k], k] for k in range(len(seeds))]
+
+
+def cached_streamlines(magnet, count: int, step: float = 0.08, maxSteps: int = 400,
+                       bounds: Sequence[float] = (-7.5, 7.5, -4.5, 4.5)) -> List[np.array]:
+    """Field lines from count seeds of magnet.seeds, traced once per magnet geometry."""
+    key = (magnet.key, count, step, maxSteps, tuple(bounds))
+    if key not in _cache:
+        _cache[key] = streamlines(magnet, magnet.seeds(count), step, maxSteps, bounds)
+    return _cache[key]
+
+
+def sg_magnet(strength: float = 1.0) -> PolePair:
+    """The Stern-Gerlach magnet: a knife-edge north pole above a grooved south pole."""
+    north = [(-2.5, 3.5), (-2.5, 1.25), (0, 0.5), (2.5, 1.25), (2.5, 3.5)]
+    south = [(-2.5, -3.5), (2.5, -3.5), (2.5, -0.5), (0.6, -0.5), (0.35, -1.0),
+             (-0.35, -1.0), (-0.6, -0.5), (-2.5, -0.5)]
+    return PolePair(north, south, strength=strength)
@@ -1,157 +1,88 @@
 from manim import *
 import numpy as np
-import random
-from typing import List
-from Magnets import Magnets
+from Magnets import create_magnets
+from components import textbox
 import vector_helpers
-
-class Particle:
-    def __init__(self, particleRadius:float,  boundaryRadius: float, boundaryPosition: np.array) -> None:
-        # Generate a random 2D vector with components in the range [-0.5, 0.5]
-        random_vector = np.random.rand(2) - 0.5
-        normalized_direction = random_vector / np.linalg.norm(random_vector)
-        self.direction = normalized_direction
-        
-        self.position = boundaryPosition + (np.random.rand(2) - 0.5) * (boundaryRadius - particleRadius)
-        
-        self.maxSpeed = 3.5
-
-        self.particleRadius: float = particleRadius
-        self.boundaryRadius: float = boundaryRadius
-        self.boundaryPosition: np.array = boundaryPosition
-
-
-    def updatePosition(self, dt) -> None:
-        self.position += self.direction / np.linalg.norm(self.direction) * self.maxSpeed * dt
-
-
-    def handleCollisions(self, particleArray: List['Particle']) -> None:
-        self.handleBoudnaryCollisions()
-        self.handleParticleCollisions(particleArray=particleArray)
-
-
-    def handleBoudnaryCollisions(self) -> None:
-        distanceFromCenter = np.linalg.norm((self.position - self.boundaryPosition))
-
-        if (distanceFromCenter + self.particleRadius > self.boundaryRadius):
-            collisionNormal = (self.position - self.boundaryPosition) / distanceFromCenter  # Normalized vector
-            self.direction = self.direction - 2 * np.dot(self.direction, collisionNormal) * collisionNormal
-            self.position = self.boundaryPosition + collisionNormal * (self.boundaryRadius - self.particleRadius)
-        
-    
-    def handleParticleCollisions(self, particleArray: List['Particle']) -> None:
-        for other in particleArray:
-            if other is self:
-                continue
-
-            # Calculate the distance between the particles
-            distance_vector = self.position - other.position
-            distance = np.linalg.norm(distance_vector)
-            radius_sum = self.particleRadius + other.particleRadius
-
-            # Check if the particles are colliding
-            if distance < radius_sum:
-                # Normalize the distance vector to get the collision normal
-                collisionNormal = distance_vector / distance
-
-                # Reflect the directions of both particles
-                self.direction = self.direction - 2 * np.dot(self.direction, collisionNormal) * collisionNormal
-                other.direction = other.direction - 2 * np.dot(other.direction, collisionNormal) * collisionNormal
-
-                # Move the particles so they are no longer overlapping
-                overlap = radius_sum - distance
-                correction = collisionNormal * overlap
-                
-                # Split the correction based on their mass or equally
-                self.position += correction / 2
-                other.position -= correction / 2
-
-                # Damping factor to prevent immediate recollision
-                damping_factor = 0.8
-                self.direction *= damping_factor
-                other.direction *= damping_factor
-
-    def moveAlongPath(self, pointsArray: np.array, dt) -> None:
-        for point in pointsArray:
-            self.moveTo(point, dt)
-        
-
-    def moveTo(self, target: np.array, dt) -> None:
-        while (np.linalg.norm(self.position - target) < 0.01):
-            self.direction = (target - self.position) / np.linalg.norm(target - self.position)
-            self.updatePosition(dt)
-
-        self.position = target
-
-    def generatePath(self, xStart: float = 0, xEnd: float = 10, stepSize: int = 150) -> np.array:
-        steps: int = int(np.ceil((xEnd - xStart) / stepSize))
-        path = np.zeros((steps, 2))
-        
-        for i in range(steps):
-            x: float = xStart + i * stepSize
-            y: float = self.pathFunction(x)
-            path[i] = np.array([x, y])
-
-        return path
-
-    def pathFunction(self, x: float):
-        return x
-
+# Re-exported, the per-object particle models used to live here
+from physics import Particle, SpatialHash, stepParticles
+from physics import oven_params
+from particle_system import Particle as ParticleView, ParticleSystem
+import profiling
+from updaters import FollowTrajectory, add_batched_updater
+from trajectories import Trajectory, TrajectoryLibrary
+from deflection import GradientMagnet, deflection_library
+from bake import FixedTimestep, TrajectoryPlayback, bake
+
+profiling.enable_from_env()
 
 class first(Scene):
+    # Play the oven back from a baked trajectory instead of simulating while rendering
+    bakePhysics = True
+    bakeDuration = 60
+    seed = 0
+    # Wall-clock seconds of live physics per rendered frame, None for no limit
+    physicsBudget = 0.05
+    maxSpeed = 3.5
+    # Spin projections of the shot atoms' curves, spin up and spin down first
+    deflectionSpins = (1, -1, *np.linspace(-1, 1, 65))
+    # The magnets start 2.5 to the right of the oven and are 3.5 * 0.65 long
+    magnet = GradientMagnet(start=2.5, end=2.5 + 3.5 * 0.65)
+
     def construct(self):
-        boundaryRadius = 1.75
-        boundary = Circle(boundaryRadius, RED, fill_opacity=0.3).shift(LEFT * 4)
-        boundaryPosition = np.array([boundary.get_x(), boundary.get_y()])
+        # Spins and paths are drawn from one generator, so a render with the same seed is the same video
+        self.rng = np.random.default_rng(self.seed)
+        numParticles = 5
+        # Shared with physics.py's CLI, so both bake the oven under the same key
+        particleParams = oven_params(numParticles, self.seed, self.maxSpeed)
+        boundary = Circle(particleParams["boundaryRadius"], RED, fill_opacity=0.3)
+        boundary.move_to([*particleParams["boundaryPosition"], 0])
         self.add(boundary)
 
-        magnets = Magnets().createMagnets().scale(0.65).shift(RIGHT * 1)
+        magnets = create_magnets().scale(0.65).shift(RIGHT * 1)
         self.add(magnets)
 
-        numParticles = 5
-
         dots = VGroup(*[Dot().scale(1.5) for _ in range(numParticles)])
-        particles = [Particle(dots[0].radius, boundaryRadius, boundaryPosition) for _ in range(numParticles)]
+        particles = ParticleSystem(**particleParams)
 
-        shoot_button = Magnets().create_textbox(BLUE, "Shoot", YELLOW, 1, 3.5).scale(0.3).next_to(boundary, DOWN, buff=1)
+        shoot_button = textbox(BLUE, "Shoot", YELLOW, 1, 3.5, label=Text).scale(0.3).next_to(boundary, DOWN, buff=1)
         self.add(shoot_button)
 
-        mmVector = Vector(vector_helpers.randomDirection(), color=GREEN).scale(0.6, scale_tips=True)
+        mmVector = Vector(vector_helpers.randomDirection(self.rng), color=GREEN).scale(0.6, scale_tips=True)
         mmVector.next_to(boundary, UP, buff=1)
         mmVectorLabel = Text("Spin", color=GREEN).scale(0.3).next_to(mmVector, DOWN)
         self.add(mmVector, mmVectorLabel)
 
-        def dot_updater(dot: Mobject, dt, particle_index):
-            particles[particle_index].updatePosition(dt)
-            particles[particle_index].handleCollisions(particles)
-            pos_x = particles[particle_index].position[0]
-            pos_y = particles[particle_index].position[1]
-            dot.move_to(np.array([pos_x, pos_y, 0]))
-
+        # Shot particles keep colliding in a baked trajectory, their dots just stop following it
+        if self.bakePhysics:
+            simulation = TrajectoryPlayback(bake(ParticleSystem, particleParams, self.bakeDuration))
+        else:
+            simulation = FixedTimestep(particles, budget=self.physicsBudget)
 
-        for i, dot in enumerate(dots):
-            dot.add_updater(lambda d, dt, i=i: dot_updater(d, dt, i))
-            dot.update()
+        # Step the physics once per frame on the group and move all dots together
+        add_batched_updater(dots, simulation.step, lambda: simulation.positions()[particles.active])
 
         self.add(dots)
 
         self.wait(3)
 
         # Move one dot along path
-        for dotIndex in range(len(dots)):
+        for dotIndex, dot in enumerate(list(dots)):
             self.play(Indicate(shoot_button))
-            dots[dotIndex].clear_updaters()
-            self.shootDot(dots[dotIndex], particles[dotIndex], boundary)
+            # Hand the dot over from the simulation to the shot animation
+            particles.active[dotIndex] = False
+            dots.remove(dot)
+            self.add(dot)
+            self.shootDot(dot, particles[dotIndex], boundary)
 
         self.wait()
 
 
-    def shootDot(self, dot: Mobject, particle: Particle, boundary: Mobject):
+    def shootDot(self, dot: Mobject, particle: ParticleView, boundary: Mobject):
         pathToEdge = self.pathToEdge(dot, boundary)
         # self.add(pathToEdge)
 
 
-        vectorDir = vector_helpers.randomDirection()
+        vectorDir = vector_helpers.randomDirection(self.rng)
         quadrant = vector_helpers.findQuadtrant(vectorDir)
         up = quadrant in [0, 1]
         v = Vector(vectorDir, color=GREEN)
@@ -168,28 +99,26 @@ class first(Scene):
 
         path = self.generatePath(up)
         # Move the path such that the start point is at the right edge of the circle
-        # I don't know why this works but it somehow does
-        path.shift(RIGHT * boundary.get_edge_center(RIGHT)[0] + UP * boundary.get_edge_center(RIGHT)[1])
-        path.set_stroke(opacity=0.3)
+        pathOffset = RIGHT * boundary.get_edge_center(RIGHT)[0] + UP * boundary.get_edge_center(RIGHT)[1]
 
         self.play(
-            MoveAlongPath(dot, pathToEdge),
+            FollowTrajectory(dot, pathToEdge),
             FadeIn(v),
-            run_time = pathToEdge.get_arc_length() /  particle.maxSpeed,
+            run_time = pathToEdge.duration(particle.maxSpeed),
             rate_func = rate_functions.linear
         )
 
         self.play(
-            MoveAlongPath(dot, path),
+            FollowTrajectory(dot, path, offset=pathOffset),
             v.animate.rotate(angle , about_point=v.get_start()),
-            run_time = path.get_arc_length() /  particle.maxSpeed,
+            run_time = path.duration(particle.maxSpeed),
             rate_func = rate_functions.linear,
         )
 
         self.play(FadeOut(v))
 
         
-    def pathToEdge(self, dot: Mobject, boundary: Mobject):
+    def pathToEdge(self, dot: Mobject, boundary: Mobject) -> Trajectory:
         startPoint = dot.get_center()
         endPoint = boundary.get_center() + np.array([boundary.radius, 0, 0])
         startHandle = np.array([
@@ -201,30 +130,23 @@ class first(Scene):
             endPoint[1], 
             0])
     
-        pathToEdge = CubicBezier(startPoint, startHandle, endHandle, endPoint)
+        pathToEdge = Trajectory.from_bezier(startPoint, startHandle, endHandle, endPoint)
         return pathToEdge
         
 
-    def generatePath(self, up=None):
+    def generatePath(self, up=None) -> Trajectory:
         if up == True:
             isSpinUp = True
         elif up == False:
             isSpinUp = False
         else: 
-            isSpinUp = np.random.randint(0, 2) == 0
-        function = ParametricFunction(self.spinUpFunction if isSpinUp else self.spinDownFunction, t_range=[0, 7])
-        return function
-
-    def generateRandomPath(self):
-        multiplier = np.random.uniform(-0.1, 0.1)
-        function = ParametricFunction(lambda t: self.randomSpinFunction(t, multiplier), t_range=[0, 7])
-        return function
-        
-    def spinUpFunction(self, t):
-        return np.array([t, 0.1 * (t - 2.5) ** 2 if t > 2.5 else 0, 0])
+            isSpinUp = self.rng.integers(0, 2) == 0
+        return self.deflections()[0 if isSpinUp else 1]
 
-    def spinDownFunction(self, t):
-        return np.array([t, -0.1 * (t - 2.5) ** 2 if t > 2.5 else 0, 0])
-    
-    def randomSpinFunction(self, t, multiplier):
-        return np.array([t, multiplier * (t - 2.5) ** 2 if t > 2.5 else 0, 0])
\ No newline at end of file
+    def generateRandomPath(self) -> Trajectory:
+        spin = self.rng.uniform(-1, 1)
+        return self.deflections().nearest(spin)
+
+    def deflections(self) -> TrajectoryLibrary:
+        # Every curve is integrated through the magnet in one batch, once for all atoms
+        return deflection_library(self.deflectionSpins, self.maxSpeed, 7, self.magnet)
@@ -1,16 +1,26 @@
 from manim import *
+import profiling
+from updaters import SimulationAnimation, add_batched_updater
+from particle_system import VelocitySwapSystem
+from bake import TrajectoryPlayback, bake
+from atom_cloud import AtomCloud, AtomCloudCamera
+from components import textbox
+from field import cached_streamlines, sg_magnet
+
+profiling.enable_from_env()
 
 def create_textbox(color, string, string_color, height=2, width=4):
-    result = VGroup() # create a VGroup
-    box = Rectangle(  # create a box
-        height=height, width=width, fill_color=color, 
-        fill_opacity=0.2, stroke_color=color
-    )
-    text = MathTex(string, color=string_color).scale(0.7).move_to(box.get_center()) # create text
-    result.add(box, text) # add both objects to the VGroup
-    return result
+    return textbox(color, string, string_color, height, width)
 
 class ParticleCollision(Scene):
+    # Play the gas back from a baked trajectory instead of simulating while rendering
+    bakePhysics = True
+    # The gas steps in close to O(N), so this can go up to tens of thousands of atoms
+    numParticles = 10
+    # particle_system.EventDrivenSystem gives the same gas at any frame rate, with no atoms passing through each
+    # other, but it is only quick enough up to a few hundred atoms
+    physics = VelocitySwapSystem
+
     def construct(self):
         # Define circle boundary
         boundary = Circle(radius=2, color=RED, fill_opacity=0.2)
@@ -22,7 +32,7 @@ class ParticleCollision(Scene):
         self.add(boundary, oven_text)
 
         # Parameters
-        num_particles = 10
+        num_particles = self.numParticles
         radius = 0.1
         speed = 2
         np.random.seed(42)
@@ -36,15 +46,17 @@ class ParticleCollision(Scene):
             ) for _ in range(num_particles)
         ])
 
-        velocities = [self.random_velocity(speed) for _ in range(num_particles)]
-
         self.add(particles)
         all_elements = VGroup(boundary, particles, oven_text)
-        # Animation loop
-        dt = 1 / self.camera.frame_rate
-        for frame in range(int(self.camera.frame_rate * 10)):  # Simulate for 10 seconds
-            self.update_positions(particles, velocities, boundary.radius, radius, dt)
-            self.wait(dt)
+        params = dict(numParticles=num_particles, particleRadius=radius, boundaryRadius=boundary.radius,
+                      speed=speed, seed=42)
+        if self.bakePhysics:
+            simulation = TrajectoryPlayback(bake(self.physics, params, 10))
+        else:
+            simulation = self.physics(**params)
+
+        # Simulate for 10 seconds as a single animation, so each frame only costs one step
+        self.play(SimulationAnimation(particles, simulation, run_time=10))
 
         oven = create_textbox(color=RED, string="Oven", string_color=WHITE)
         self.play(ReplacementTransform(VGroup(particles, boundary, oven_text), oven))
@@ -62,48 +74,57 @@ class ParticleCollision(Scene):
         x, y = r * np.cos(angle), r * np.sin(angle)
         return np.array([x, y, 0])
 
-    def random_velocity(self, speed):
-        angle = np.random.uniform(0, 2 * np.pi)
-        vx, vy = speed * np.cos(angle), speed * np.sin(angle)
-        return np.array([vx, vy, 0])
-
-    def update_positions(self, particles, velocities, boundary_radius, particle_radius, dt):
-        for i, particle in enumerate(particles):
-            new_pos = particle.get_center() + velocities[i] * dt
-
-            # Check collision with boundary
-            if np.linalg.norm(new_pos) + particle_radius > boundary_radius:
-                normal = new_pos / np.linalg.norm(new_pos)
-                velocities[i] -= 2 * np.dot(velocities[i], normal) * normal
-                new_pos = particle.get_center() + velocities[i] * dt
-
-            # Check collision with other particles
-            for j, other_particle in enumerate(particles):
-                if i != j:
-                    if np.linalg.norm(new_pos - other_particle.get_center()) < 2 * particle_radius:
-                        velocities[i], velocities[j] = velocities[j], velocities[i]
-
-            particle.move_to(new_pos)
-
 
 class StreamOfParticles(Scene):
+    def __init__(self, **kwargs) -> None:
+        kwargs.setdefault("camera_class", AtomCloudCamera)
+        super().__init__(**kwargs)
+
     def construct(self):
         num_particles = 500
         xSpeed = 0.1
 
-        particles = VGroup(*[Dot(color=WHITE) for _ in range(num_particles)]).arrange(RIGHT, buff=0.5)
-        particles.to_edge(LEFT).shift(LEFT * (particles.width + 1))
+        # Same row as Dots arranged RIGHT with buff=0.5, but as one point cloud
+        radius = DEFAULT_DOT_RADIUS
+        positions = np.column_stack((np.arange(num_particles) * (2 * radius + 0.5), np.zeros((num_particles, 2))))
+        particles = AtomCloud(positions, radius=radius, colors=[WHITE])
+        particles.to_edge(LEFT, buff=DEFAULT_MOBJECT_TO_EDGE_BUFFER + radius).shift(
+            LEFT * (particles.width + 2 * radius + 1))
 
         self.add(particles)
 
-        def particle_updater(mob: Mobject):
-            mob.move_to(mob.get_center() + [xSpeed, 0, 0])
+        positions = particles.points.copy()
+
+        def step(dt):
+            positions[:, 0] += xSpeed
 
-        for particle in particles:
-            particle.add_updater(particle_updater)
+        # One updater for the whole stream instead of one closure per dot
+        add_batched_updater(particles, step, lambda: positions)
 
         self.wait(30, frozen_frame=False)
 
 class InhomogenousMagnetiField(Scene):
+    # Traced from the north pole in one batch, a few hundred take well under a second
+    numFieldLines = 200
+
     def construct(self):
-        title = Text("")
\ No newline at end of file
+        title = Text("Inhomogeneous magnetic field").scale(0.6).to_edge(UP)
+
+        magnet = sg_magnet()
+        north = Polygon(*magnet.north, color=RED, fill_opacity=0.3)
+        south = Polygon(*magnet.south, color=BLUE, fill_opacity=0.3)
+        north_label = Text("N", color=WHITE).scale(0.7).move_to(north.get_center() + UP)
+        south_label = Text("S", color=WHITE).scale(0.7).move_to(south.get_center() + DOWN)
+        poles = VGroup(north, south, north_label, south_label)
+
+        mf_lines = VGroup(*[VMobject(stroke_width=1).set_points_as_corners(line)
+                            for line in cached_streamlines(magnet, self.numFieldLines)])
+        mf_lines.set_color(GRAY)
+
+        # The field is traced in the magnet's own coordinates, both are scaled together
+        VGroup(mf_lines, poles).scale(0.8, about_point=ORIGIN).shift(DOWN * 0.3)
+
+        self.add(title)
+        self.play(FadeIn(poles))
+        self.play(Create(mf_lines), run_time=3)
+        self.wait()
@@ -0,0 +1,457 @@
+import heapq
+import math
+import numpy as np
+from typing import Tuple
+
+
+class ParticleSystem:
+    """Struct-of-arrays version of fullExp.Particle for large numbers of atoms.
+
+    Every atom lives in a row of the contiguous arrays below and one call to
+    step moves, bounces and collides all of them with whole-array NumPy
+    operations. Indexing the system gives a Particle view of a single atom.
+    """
+
+    def __init__(self, numParticles: int, particleRadius: float, boundaryRadius: float,
+                 boundaryPosition: np.array, maxSpeed: float = 3.5, seed: int = None) -> None:
+        self.rng = np.random.default_rng(seed)
+
+        # Random directions with components in the range [-0.5, 0.5], normalized
+        direction = self.rng.random((numParticles, 2)) - 0.5
+        self.direction: np.array = direction / np.linalg.norm(direction, axis=1)[:, None]
+
+        self.boundaryRadius: float = boundaryRadius
+        self.boundaryPosition: np.array = np.asarray(boundaryPosition, dtype=np.float64)[:2]
+
+        self.position: np.array = self.boundaryPosition + (self.rng.random((numParticles, 2)) - 0.5) * (
+                boundaryRadius - particleRadius)
+        self.particleRadius: np.array = np.full(numParticles, particleRadius, dtype=np.float64)
+        self.maxSpeed: np.array = np.full(numParticles, maxSpeed, dtype=np.float64)
+
+        # Atoms that are taken out of the oven (e.g. shot through the magnet) are not stepped
+        self.active: np.array = np.ones(numParticles, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def __getitem__(self, index: int) -> 'Particle':
+        return Particle(self, index)
+
+    def positions(self) -> np.array:
+        return self.position
+
+    def step(self, dt) -> None:
+        self.updatePosition(dt)
+        self.handleBoundaryCollisions()
+        self.handleParticleCollisions()
+
+    def updatePosition(self, dt) -> None:
+        self.position[self.active] += self.direction[self.active] * (self.maxSpeed[self.active] * dt)[:, None]
+
+    def handleBoundaryCollisions(self) -> None:
+        offset = self.position - self.boundaryPosition
+        distanceFromCenter = np.linalg.norm(offset, axis=1)
+        hit = self.active & (distanceFromCenter + self.particleRadius > self.boundaryRadius)
+        if not hit.any():
+            return
+
+        collisionNormal = offset[hit] / distanceFromCenter[hit][:, None]
+        direction = self.direction[hit]
+        self.direction[hit] = direction - 2 * np.sum(direction * collisionNormal, axis=1)[:, None] * collisionNormal
+        self.position[hit] = self.boundaryPosition + collisionNormal * (
+                self.boundaryRadius - self.particleRadius[hit])[:, None]
+
+    def handleParticleCollisions(self) -> None:
+        activeIndices = np.flatnonzero(self.active)
+        if len(activeIndices) < 2:
+            return
+        i, j = neighbourPairs(self.position[activeIndices], 2 * self.particleRadius.max())
+        i, j = activeIndices[i], activeIndices[j]
+
+        distance_vector = self.position[i] - self.position[j]
+        distance = np.linalg.norm(distance_vector, axis=1)
+        radius_sum = self.particleRadius[i] + self.particleRadius[j]
+
+        colliding = distance < radius_sum
+        if not colliding.any():
+            return
+        i, j = i[colliding], j[colliding]
+        distance_vector, distance, radius_sum = distance_vector[colliding], distance[colliding], radius_sum[colliding]
+
+        # Particles sitting exactly on top of each other get an arbitrary normal
+        distance_vector[distance == 0] = [1, 0]
+        distance[distance == 0] = 1
+        collisionNormal = distance_vector / distance[:, None]
+
+        # Every contact reflects and separates both atoms, an atom touching several
+        # others gets the sum of the responses
+        numParticles = len(self)
+        correction = collisionNormal * ((radius_sum - distance) / 2)[:, None]
+        reflection_i = -2 * np.sum(self.direction[i] * collisionNormal, axis=1)[:, None] * collisionNormal
+        reflection_j = -2 * np.sum(self.direction[j] * collisionNormal, axis=1)[:, None] * collisionNormal
+        for axis in range(2):
+            self.position[:, axis] += np.bincount(i, correction[:, axis], numParticles)
+            self.position[:, axis] -= np.bincount(j, correction[:, axis], numParticles)
+            self.direction[:, axis] += np.bincount(i, reflection_i[:, axis], numParticles)
+            self.direction[:, axis] += np.bincount(j, reflection_j[:, axis], numParticles)
+
+        # Speed is kept separately, so directions stay unit vectors
+        norm = np.linalg.norm(self.direction, axis=1)
+        norm[norm == 0] = 1
+        self.direction /= norm[:, None]
+
+
+class Particle:
+    """View of a single atom of a ParticleSystem.
+
+    Has the same attributes as fullExp.Particle, but reads and writes go
+    straight to the system's arrays.
+    """
+
+    def __init__(self, system: ParticleSystem, index: int) -> None:
+        self.system = system
+        self.index = index
+
+    @property
+    def position(self) -> np.array:
+        return self.system.position[self.index]
+
+    @position.setter
+    def position(self, value: np.array) -> None:
+        self.system.position[self.index] = value
+
+    @property
+    def direction(self) -> np.array:
+        return self.system.direction[self.index]
+
+    @direction.setter
+    def direction(self, value: np.array) -> None:
+        self.system.direction[self.index] = value
+
+    @property
+    def particleRadius(self) -> float:
+        return self.system.particleRadius[self.index]
+
+    @property
+    def maxSpeed(self) -> float:
+        return self.system.maxSpeed[self.index]
+
+    @property
+    def boundaryRadius(self) -> float:
+        return self.system.boundaryRadius
+
+    @property
+    def boundaryPosition(self) -> np.array:
+        return self.system.boundaryPosition
+
+
+def neighbourPairs(position: np.array, cellSize: float) -> Tuple[np.array, np.array]:
+    """Returns index arrays (i, j) of every pair of points in the same or in
+    neighbouring grid cells of size cellSize. Each pair appears once.
+    """
+    numPoints = len(position)
+    if numPoints < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Shift cells so y starts at 1, then y - 1 and y + 1 never wrap into another column
+    cells = np.floor(position / cellSize).astype(np.int64)
+    cells -= cells.min(axis=0) - [0, 1]
+    width = cells[:, 1].max() + 2
+    keys = cells[:, 0] * width + cells[:, 1]
+
+    # Work in sorted order so the lookups below search with sorted targets
+    order = np.argsort(keys, kind="stable")
+    sortedKeys = keys[order]
+
+    pairs_i, pairs_j = [], []
+    # Own cell plus half of the neighbours, so no pair is found twice
+    for dx, dy in [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]:
+        target = sortedKeys + dx * width + dy
+        start = np.searchsorted(sortedKeys, target, "left")
+        counts = np.searchsorted(sortedKeys, target, "right") - start
+
+        i = np.repeat(np.arange(numPoints), counts)
+        j = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+        if dx == 0 and dy == 0:
+            keep = i < j
+            i, j = i[keep], j[keep]
+        pairs_i.append(order[i])
+        pairs_j.append(order[j])
+
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+class VelocitySwapSystem:
+    """NumPy version of the gas in particle_collision.ParticleCollision.
+
+    Atoms move with their own velocity, reflect off a circular boundary at the
+    origin and swap velocities with any atom they touch (equal mass elastic
+    collision). Contacts come from the neighbourPairs grid instead of testing
+    every pair and each one is resolved once, only while the two atoms move
+    closer, so a step costs close to O(N). The initial state is drawn in the
+    same order as the scene draws it, so the same seed gives the same gas.
+    """
+
+    # Part of the bake key, bump it whenever step changes what a bake contains
+    bakeVersion = 2
+
+    def __init__(self, numParticles: int, particleRadius: float, boundaryRadius: float,
+                 speed: float, seed: int = None) -> None:
+        random_state = np.random.RandomState(seed)
+
+        angle = np.empty(numParticles)
+        r = np.empty(numParticles)
+        for k in range(numParticles):
+            angle[k] = random_state.uniform(0, 2 * np.pi)
+            r[k] = random_state.uniform(0, boundaryRadius - particleRadius)
+        self.position: np.array = np.column_stack((r * np.cos(angle), r * np.sin(angle)))
+
+        angle = np.array([random_state.uniform(0, 2 * np.pi) for _ in range(numParticles)])
+        self.velocity: np.array = speed * np.column_stack((np.cos(angle), np.sin(angle)))
+
+        self.particleRadius: float = particleRadius
+        self.boundaryRadius: float = boundaryRadius
+
+    def positions(self) -> np.array:
+        return self.position
+
+    def step(self, dt) -> None:
+        position, velocity = self.position, self.velocity
+        new_pos = position + velocity * dt
+
+        # Check collision with boundary
+        distance = np.linalg.norm(new_pos, axis=1)
+        hit = distance + self.particleRadius > self.boundaryRadius
+        if hit.any():
+            normal = new_pos[hit] / distance[hit][:, None]
+            velocity[hit] -= 2 * np.sum(velocity[hit] * normal, axis=1)[:, None] * normal
+            new_pos[hit] = position[hit] + velocity[hit] * dt
+
+        # Check collision with other particles, grid cells of one contact distance hold every touching pair
+        contact = 2 * self.particleRadius
+        i, j = neighbourPairs(new_pos, contact)
+        touching = np.sum((new_pos[i] - new_pos[j]) ** 2, axis=1) < contact * contact
+        self.swapVelocities(new_pos, i[touching], j[touching])
+
+        position[:] = new_pos
+
+    def swapVelocities(self, position: np.array, i: np.array, j: np.array) -> None:
+        """Swaps the velocities of every touching pair (i, j) that is moving
+        closer, once. An atom that touches several others at once takes part
+        in at most one swap per round, so the swaps of a round never overlap.
+        """
+        velocity = self.velocity
+        while len(i):
+            approaching = np.sum((velocity[i] - velocity[j]) * (position[i] - position[j]), axis=1) < 0
+            i, j = i[approaching], j[approaching]
+
+            # Pairs whose atoms don't appear in any earlier pair, the first pair always qualifies
+            rank = np.arange(len(i))
+            firstPair = np.full(len(velocity), len(i))
+            np.minimum.at(firstPair, i, rank)
+            np.minimum.at(firstPair, j, rank)
+            free = (firstPair[i] == rank) & (firstPair[j] == rank)
+
+            velocity[np.concatenate((i[free], j[free]))] = velocity[np.concatenate((j[free], i[free]))]
+            i, j = i[~free], j[~free]
+
+
+class EventDrivenSystem(VelocitySwapSystem):
+    """Hard-disk version of VelocitySwapSystem that never tunnels, whatever dt is.
+
+    Instead of moving by dt and looking for overlaps, it predicts the exact
+    time of every atom-wall and atom-atom impact and keeps them in a priority
+    queue. step(dt) jumps from one impact to the next until dt is used up, so
+    a large dt gives the same gas as a small one and costs the same
+    number of collisions. Atoms keep their own last event time and are only
+    moved when they take part in an event or when positions() is read.
+
+    Atoms only look for impacts with their neighbours, the atoms that were
+    within 2 * particleRadius + skin when the neighbour lists were last built
+    (from the neighbourPairs grid). Lists are rebuilt once atoms at the
+    fastest speed could have closed the skin, or right away when a collision
+    makes an atom faster than that. Every atom only queues its wall impact
+    and its earliest atom impact, and when the other atom collides first it
+    predicts again. Stale entries are dropped once they outnumber live ones.
+
+    Every collision costs a couple of pure-Python predict calls, so the cost
+    grows with the number of collisions, not with dt. That is fine for a few
+    hundred atoms, but 2000 atoms of radius 0.02 take about 8 s of wall time
+    per simulated second. For big gases use VelocitySwapSystem and bake them.
+    """
+
+    bakeVersion = 2
+
+    def __init__(self, numParticles: int, particleRadius: float, boundaryRadius: float,
+                 speed: float, seed: int = None, skin: float = None) -> None:
+        super().__init__(numParticles, particleRadius, boundaryRadius, speed, seed)
+        self.skin = 4 * particleRadius if skin is None else skin
+        self.time = 0.0
+        # Position of every atom at its own lastTime
+        self.lastTime: np.array = np.zeros(numParticles)
+        # Bumped on every collision, events predicted with an older count are stale
+        self.collisionCount: np.array = np.zeros(numParticles, dtype=np.int64)
+        self.events = []
+        self.eventId = 0
+        self.rebuild()
+
+    def positions(self) -> np.array:
+        return self.positionsAt(self.time)
+
+    def positionsAt(self, time: float) -> np.array:
+        return self.position + self.velocity * (time - self.lastTime)[:, None]
+
+    def rebuild(self) -> None:
+        """Builds the neighbour lists at the current time and predicts every atom again."""
+        self.position = self.positionsAt(self.time)
+        self.lastTime[:] = self.time
+
+        reach = 2 * self.particleRadius + self.skin
+        i, j = neighbourPairs(self.position, reach)
+        close = np.sum((self.position[i] - self.position[j]) ** 2, axis=1) < reach * reach
+        i, j = i[close], j[close]
+        # Neighbours of atom k are neighbours[offsets[k]:offsets[k + 1]]
+        source, target = np.concatenate((i, j)), np.concatenate((j, i))
+        order = np.argsort(source, kind="stable")
+        self.neighbours = target[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(source, minlength=len(self.position)))))
+
+        # Atoms that aren't neighbours are too far apart to meet before the lists expire. The limit has
+        # headroom, collisions keep speeding atoms up until the speeds are spread out
+        self.speedLimit = 1.5 * float(np.sqrt(np.max(np.sum(self.velocity ** 2, axis=1), initial=0)))
+        self.expires = self.time + self.skin / (2 * self.speedLimit) if self.speedLimit > 0 else np.inf
+
+        # Same as predict for every atom, but for all of them at once
+        p, v = self.position, self.velocity
+        a = np.sum(v * v, axis=1)
+        b = np.sum(p * v, axis=1)
+        c = np.sum(p * p, axis=1) - (self.boundaryRadius - self.particleRadius) ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            wallTime = np.where((c > 0) & (b > 0), 0.0, (-b + np.sqrt(np.maximum(b * b - a * c, 0))) / a)
+        walls = np.flatnonzero((a > 0) & (wallTime <= self.expires - self.time))
+
+        dp, dv = p[j] - p[i], v[j] - v[i]
+        b = np.sum(dp * dv, axis=1)
+        dvdv = np.sum(dv * dv, axis=1)
+        c = np.sum(dp * dp, axis=1) - (2 * self.particleRadius) ** 2
+        discriminant = b * b - dvdv * c
+        hit = (b < 0) & (discriminant >= 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pairTime = np.where(c < 0, 0.0, (-b - np.sqrt(np.maximum(discriminant, 0))) / dvdv)
+        hit &= pairTime <= self.expires - self.time
+        # Earliest impact of every atom, from both ends of each pair
+        first, second, pairTime = np.concatenate((i[hit], j[hit])), np.concatenate((j[hit], i[hit])), \
+            np.tile(pairTime[hit], 2)
+        order = np.lexsort((pairTime, first))
+        earliest = order[np.flatnonzero(np.diff(first[order], prepend=-1))]
+
+        self.events = []
+        for k in walls:
+            self.push(float(wallTime[k]), int(k), -1)
+        for k in earliest:
+            self.push(float(pairTime[k]), int(first[k]), int(second[k]))
+        if np.isfinite(self.expires):
+            self.push(self.expires - self.time, -1, -1)
+
+    def step(self, dt) -> None:
+        end = self.time + dt
+        while self.events and self.events[0][0] <= end:
+            time, _, i, j, count_i, count_j = heapq.heappop(self.events)
+            if i < 0:
+                # The neighbour lists expired
+                self.time = time
+                self.rebuild()
+                continue
+            if self.collisionCount[i] != count_i:
+                continue
+            if j >= 0 and self.collisionCount[j] != count_j:
+                # j collided with someone else first, so this was i's only queued atom impact
+                self.time = time
+                self.predict(i, wall=False)
+                continue
+
+            self.time = time
+            involved = [i] if j < 0 else [i, j]
+            self.position[involved] += self.velocity[involved] * (time - self.lastTime[involved])[:, None]
+            self.lastTime[involved] = time
+
+            if j < 0:
+                self.bounceOffWall(i)
+            else:
+                self.collide(i, j)
+
+            self.collisionCount[involved] += 1
+            if np.max(np.sum(self.velocity[involved] ** 2, axis=1)) > self.speedLimit ** 2:
+                self.rebuild()
+                continue
+            for k in involved:
+                self.predict(k)
+
+            # Every atom has at most a wall and an atom impact live, the rest is stale
+            if len(self.events) > 4 * len(self.position) + 64:
+                self.compact()
+        self.time = end
+
+    def bounceOffWall(self, i: int) -> None:
+        normal = self.position[i] / np.linalg.norm(self.position[i])
+        self.velocity[i] -= 2 * np.dot(self.velocity[i], normal) * normal
+
+    def collide(self, i: int, j: int) -> None:
+        # Equal mass elastic impact, the atoms exchange their velocity along the line of centers
+        normal = self.position[j] - self.position[i]
+        normal /= np.linalg.norm(normal)
+        exchange = np.dot(self.velocity[j] - self.velocity[i], normal) * normal
+        self.velocity[i] += exchange
+        self.velocity[j] -= exchange
+
+    def predict(self, i: int, wall: bool = True) -> None:
+        """Queues the next wall impact of atom i and its earliest impact with a neighbour,
+        if they happen before the neighbour lists expire.
+        """
+        v = self.velocity[i]
+        p = self.position[i] + v * (self.time - self.lastTime[i])
+        px, py, vx, vy = float(p[0]), float(p[1]), float(v[0]), float(v[1])
+
+        # Wall: |p + v t| = boundaryRadius - particleRadius, the atom is inside so take the later root
+        a = vx * vx + vy * vy
+        if wall and a > 0:
+            b = px * vx + py * vy
+            c = px * px + py * py - (self.boundaryRadius - self.particleRadius) ** 2
+            t = 0.0 if c > 0 and b > 0 else (-b + math.sqrt(max(b * b - a * c, 0))) / a
+            if self.time + t <= self.expires:
+                self.push(t, i, -1)
+
+        neighbours = self.neighbours[self.offsets[i]:self.offsets[i + 1]]
+        if len(neighbours) == 0:
+            return
+
+        # Atoms: |dp + dv t| = 2 * particleRadius while they approach, take the earlier root
+        dv = self.velocity[neighbours] - v
+        dp = self.position[neighbours] + self.velocity[neighbours] * (self.time - self.lastTime[neighbours])[:, None] - p
+        b = np.einsum("ij,ij->i", dp, dv)
+        dvdv = np.einsum("ij,ij->i", dv, dv)
+        c = np.einsum("ij,ij->i", dp, dp) - (2 * self.particleRadius) ** 2
+        discriminant = b * b - dvdv * c
+        hit = np.flatnonzero((b < 0) & (discriminant >= 0))
+        if len(hit) == 0:
+            return
+
+        # Overlapping atoms that still approach (e.g. from the random start) collide right away
+        b, c, dvdv, discriminant = b[hit], c[hit], dvdv[hit], discriminant[hit]
+        t = np.where(c < 0, 0.0, (-b - np.sqrt(discriminant)) / dvdv)
+        k = int(np.argmin(t))
+        if self.time + t[k] <= self.expires:
+            self.push(float(t[k]), i, int(neighbours[hit[k]]))
+
+    def compact(self) -> None:
+        count = self.collisionCount
+        self.events = [event for event in self.events if event[2] < 0 or (
+            count[event[2]] == event[4] and (event[3] < 0 or count[event[3]] == event[5]))]
+        heapq.heapify(self.events)
+
+    def push(self, delay: float, i: int, j: int) -> None:
+        self.eventId += 1
+        count_i = self.collisionCount[i] if i >= 0 else 0
+        count_j = self.collisionCount[j] if j >= 0 else 0
+        heapq.heappush(self.events, (self.time + delay, self.eventId, i, j, count_i, count_j))
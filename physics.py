@@ -0,0 +1,399 @@
+"""Particle models without any manim import.
+
+Scenes import their physics from here, so stepping, benchmarking or baking
+the atoms only needs NumPy. Run it as a script to step a model headless and
+dump the final state, e.g.
+
+    python physics.py oven -n 1000 -t 10 -o oven.npz
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from particle_system import EventDrivenSystem, ParticleSystem, VelocitySwapSystem
+from bake import bake
+
+class Particle:
+    def __init__(self, particleRadius:float,  boundaryRadius: float, boundaryPosition: np.array) -> None:
+        # Generate a random 2D vector with components in the range [-0.5, 0.5]
+        random_vector = np.random.rand(2) - 0.5
+        normalized_direction = random_vector / np.linalg.norm(random_vector)
+        self.direction = normalized_direction
+        
+        self.position = boundaryPosition + (np.random.rand(2) - 0.5) * (boundaryRadius - particleRadius)
+        
+        self.maxSpeed = 3.5
+
+        self.particleRadius: float = particleRadius
+        self.boundaryRadius: float = boundaryRadius
+        self.boundaryPosition: np.array = boundaryPosition
+
+
+    def updatePosition(self, dt) -> None:
+        self.position += self.direction / np.linalg.norm(self.direction) * self.maxSpeed * dt
+
+
+    def handleCollisions(self, particleArray: List['Particle']) -> None:
+        self.handleBoudnaryCollisions()
+        self.handleParticleCollisions(particleArray=particleArray)
+
+
+    def handleBoudnaryCollisions(self) -> None:
+        distanceFromCenter = np.linalg.norm((self.position - self.boundaryPosition))
+
+        if (distanceFromCenter + self.particleRadius > self.boundaryRadius):
+            collisionNormal = (self.position - self.boundaryPosition) / distanceFromCenter  # Normalized vector
+            self.direction = self.direction - 2 * np.dot(self.direction, collisionNormal) * collisionNormal
+            self.position = self.boundaryPosition + collisionNormal * (self.boundaryRadius - self.particleRadius)
+        
+    
+    def handleParticleCollisions(self, particleArray: List['Particle']) -> None:
+        for other in particleArray:
+            if other is self:
+                continue
+
+            self.resolveCollision(other)
+
+    def resolveCollision(self, other: 'Particle') -> None:
+        # Calculate the distance between the particles
+        distance_vector = self.position - other.position
+        distance = np.linalg.norm(distance_vector)
+        radius_sum = self.particleRadius + other.particleRadius
+
+        # Check if the particles are colliding
+        if distance < radius_sum:
+            # Normalize the distance vector to get the collision normal
+            collisionNormal = distance_vector / distance
+
+            # Reflect the directions of both particles
+            self.direction = self.direction - 2 * np.dot(self.direction, collisionNormal) * collisionNormal
+            other.direction = other.direction - 2 * np.dot(other.direction, collisionNormal) * collisionNormal
+
+            # Move the particles so they are no longer overlapping
+            overlap = radius_sum - distance
+            correction = collisionNormal * overlap
+
+            # Split the correction based on their mass or equally
+            self.position += correction / 2
+            other.position -= correction / 2
+
+            # Damping factor to prevent immediate recollision
+            damping_factor = 0.8
+            self.direction *= damping_factor
+            other.direction *= damping_factor
+
+    def moveAlongPath(self, pointsArray: np.array, dt) -> None:
+        for point in pointsArray:
+            self.moveTo(point, dt)
+        
+
+    def moveTo(self, target: np.array, dt) -> None:
+        while (np.linalg.norm(self.position - target) < 0.01):
+            self.direction = (target - self.position) / np.linalg.norm(target - self.position)
+            self.updatePosition(dt)
+
+        self.position = target
+
+    def generatePath(self, xStart: float = 0, xEnd: float = 10, stepSize: int = 150) -> np.array:
+        steps: int = int(np.ceil((xEnd - xStart) / stepSize))
+        path = np.zeros((steps, 2))
+        
+        for i in range(steps):
+            x: float = xStart + i * stepSize
+            y: float = self.pathFunction(x)
+            path[i] = np.array([x, y])
+
+        return path
+
+    def pathFunction(self, x: float):
+        return x
+
+
+class SpatialHash:
+    """Uniform grid broad phase for particle-particle collisions.
+
+    Cells are two collision diameters wide, so any two particles that touch,
+    or get pushed into each other while an earlier pair is separated, are in
+    the same or in neighbouring cells. Only those pairs are handed to
+    Particle.resolveCollision, and every pair is reported once.
+    """
+
+    # Half of the 3x3 neighbourhood, so (a, b) and (b, a) are not both visited
+    NEIGHBOUR_OFFSETS = [(1, -1), (1, 0), (1, 1), (0, 1)]
+
+    def __init__(self, particleRadius: float) -> None:
+        self.cellSize: float = 4 * particleRadius
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+
+    def build(self, particleArray: List[Particle]) -> None:
+        self.cells = {}
+        for index, particle in enumerate(particleArray):
+            cell = (int(np.floor(particle.position[0] / self.cellSize)),
+                    int(np.floor(particle.position[1] / self.cellSize)))
+            self.cells.setdefault(cell, []).append(index)
+
+    def candidatePairs(self) -> List[Tuple[int, int]]:
+        pairs = []
+        for (cx, cy), indices in self.cells.items():
+            for a in range(len(indices)):
+                for b in range(a + 1, len(indices)):
+                    pairs.append((indices[a], indices[b]))
+
+            for dx, dy in self.NEIGHBOUR_OFFSETS:
+                for other in self.cells.get((cx + dx, cy + dy), ()):
+                    for index in indices:
+                        pairs.append((index, other))
+
+        # Resolve in the same (i, j) order as the all-pairs loop so both paths agree
+        return sorted((min(i, j), max(i, j)) for i, j in pairs)
+
+
+def stepParticles(particleArray: List[Particle], dt, spatialHash: SpatialHash = None) -> None:
+    """Advance every particle by dt and resolve each colliding pair once.
+
+    Without a spatialHash every pair is tested (O(N^2)), which is only meant for
+    a handful of particles or for checking the broad phase against.
+    """
+    for particle in particleArray:
+        particle.updatePosition(dt)
+        particle.handleBoudnaryCollisions()
+
+    if spatialHash is None:
+        pairs = ((i, j) for i in range(len(particleArray)) for j in range(i + 1, len(particleArray)))
+    else:
+        spatialHash.build(particleArray)
+        pairs = spatialHash.candidatePairs()
+
+    for i, j in pairs:
+        particleArray[i].resolveCollision(particleArray[j])
+
+
+class DiskSampler:
+    """Uniformly distributed points in a disk for numStreams atoms, each
+    pulling its own sequence of points with next(stream) or take(streams).
+
+    Points are drawn blockSize per atom at a time, for all atoms at once,
+    with the polar method r = radius * sqrt(u), so nothing is rejected. Block
+    g holds the points g * blockSize onwards of every atom and blocks are
+    drawn from the one Generator in order, so the points an atom gets only
+    depend on seed and numStreams, not on when the other atoms use theirs.
+    """
+
+    def __init__(self, numStreams: int, radius: float = 1, center=(0, 0, 0), seed: int = None,
+                 blockSize: int = 32) -> None:
+        self.numStreams = numStreams
+        self.radius = radius
+        self.center = np.asarray(center, dtype=np.float64)
+        self.blockSize = blockSize
+        self.random_gen = np.random.default_rng(seed)
+        self.cursor = np.zeros(numStreams, dtype=np.int64)
+        # generation -> (blockSize, numStreams, 3) points, and how many streams still read it
+        self.blocks: Dict[int, np.array] = {}
+        self.readers: Dict[int, int] = {}
+        self.drawn = 0
+
+    def block(self, generation: int) -> np.array:
+        while self.drawn <= generation:
+            u, angle = self.random_gen.random((2, self.blockSize, self.numStreams))
+            r = self.radius * np.sqrt(u)
+            angle *= 2 * np.pi
+            block = np.empty((self.blockSize, self.numStreams, 3))
+            block[..., 0] = r * np.cos(angle)
+            block[..., 1] = r * np.sin(angle)
+            block[..., 2] = 0
+            self.blocks[self.drawn] = block + self.center
+            self.readers[self.drawn] = self.numStreams
+            self.drawn += 1
+        return self.blocks[generation]
+
+    def release(self, generation: int, streams: int = 1) -> None:
+        # Streams moved on to the next block, drop this one once nobody reads it
+        self.readers[generation] -= streams
+        if self.readers[generation] == 0:
+            del self.blocks[generation], self.readers[generation]
+
+    def next(self, stream: int) -> np.array:
+        cursor = int(self.cursor[stream])
+        self.cursor[stream] = cursor + 1
+        generation, row = divmod(cursor, self.blockSize)
+        point = self.block(generation)[row, stream]
+        if row == self.blockSize - 1:
+            self.release(generation)
+        return point
+
+    def take(self, streams: np.array) -> np.array:
+        """The next point of every stream in streams (distinct indices), as (K, 3)."""
+        streams = np.asarray(streams, dtype=np.int64)
+        cursor = self.cursor[streams]
+        self.cursor[streams] += 1
+        generation, row = np.divmod(cursor, self.blockSize)
+        points = np.empty((len(streams), 3))
+        for g in np.unique(generation):
+            mask = generation == g
+            points[mask] = self.block(int(g))[row[mask], streams[mask]]
+        for g, count in zip(*np.unique(generation[row == self.blockSize - 1], return_counts=True)):
+            self.release(int(g), int(count))
+        return points
+
+
+class OvenAtom:
+    """Atom of SGExp's oven that drifts between random points inside a circle
+    of radius ovenRadius around ovenCenter, taking transition_time seconds
+    for each leg. The points come from stream of sampler, atoms of one oven
+    share a DiskSampler so the whole oven follows one seed.
+    """
+
+    def __init__(self, ovenRadius: float, ovenCenter: np.array, sampler: DiskSampler = None, stream: int = 0) -> None:
+        self.ovenRadius = ovenRadius
+        self.ovenCenter = np.asarray(ovenCenter, dtype=np.float64)
+        self.sampler = sampler or DiskSampler(1, ovenRadius, ovenCenter)
+        self.stream = stream
+        self.old_position = self.generate_position()
+        self.new_position = self.generate_position()
+        self.transition_time = 2  # Time to move from old_position to new_position
+        self.time_elapsed = 0
+
+    def generate_position(self) -> np.array:
+        return self.sampler.next(self.stream)
+
+    def update_position(self, dt):
+        self.time_elapsed += dt
+        alpha = min(self.time_elapsed / self.transition_time, 1)
+        new_pos = self.old_position + (self.new_position - self.old_position) * alpha
+        if alpha >= 1:
+            self.old_position = self.new_position
+            self.new_position = self.generate_position()
+            self.time_elapsed = 0
+        return new_pos
+
+
+class OvenAtoms:
+    """step(dt) / positions() wrapper around a list of OvenAtom."""
+
+    def __init__(self, numParticles: int, ovenRadius: float = 1, ovenCenter=(0, 0, 0), seed: int = None) -> None:
+        sampler = DiskSampler(numParticles, ovenRadius, ovenCenter, seed)
+        self.atoms = [OvenAtom(ovenRadius, ovenCenter, sampler, i) for i in range(numParticles)]
+        self.position = np.array([atom.old_position for atom in self.atoms])
+
+    def positions(self) -> np.array:
+        return self.position
+
+    def step(self, dt) -> None:
+        self.position[:] = [atom.update_position(dt) for atom in self.atoms]
+
+
+class OvenModel:
+    """All of an oven's OvenAtoms as arrays: old and new targets, (N, 3)
+    each, and the time elapsed on every atom's current leg.
+
+    One step moves every atom and retargets the ones that arrived with a
+    single masked update, giving the same positions as stepping an OvenAtom
+    per atom with the same sampler.
+    """
+
+    def __init__(self, numParticles: int, ovenRadius: float = 1, ovenCenter=(0, 0, 0), seed: int = None,
+                 transition_time: float = 2) -> None:
+        self.sampler = DiskSampler(numParticles, ovenRadius, ovenCenter, seed)
+        self.streams = np.arange(numParticles)
+        self.old_position = self.sampler.take(self.streams)
+        self.new_position = self.sampler.take(self.streams)
+        self.time_elapsed = np.zeros(numParticles)
+        self.transition_time = transition_time
+        self.position = self.old_position.copy()
+
+    def positions(self) -> np.array:
+        return self.position
+
+    def step(self, dt) -> None:
+        self.time_elapsed += dt
+        alpha = np.minimum(self.time_elapsed / self.transition_time, 1)
+        np.subtract(self.new_position, self.old_position, out=self.position)
+        self.position *= alpha[:, None]
+        self.position += self.old_position
+
+        arrived = alpha >= 1
+        if arrived.any():
+            self.old_position[arrived] = self.new_position[arrived]
+            self.new_position[arrived] = self.sampler.take(self.streams[arrived])
+            self.time_elapsed[arrived] = 0
+
+
+class ParticleList:
+    """step(dt) / positions() wrapper around a list of Particle, stepped with a SpatialHash."""
+
+    def __init__(self, numParticles: int, particleRadius: float = 0.12, boundaryRadius: float = 1.75,
+                 boundaryPosition=(0, 0), seed: int = None) -> None:
+        np.random.seed(seed)
+        boundaryPosition = np.asarray(boundaryPosition, dtype=np.float64)
+        self.particles = [Particle(particleRadius, boundaryRadius, boundaryPosition) for _ in range(numParticles)]
+        self.spatialHash = SpatialHash(particleRadius)
+
+    def positions(self) -> np.array:
+        return np.array([particle.position for particle in self.particles])
+
+    def step(self, dt) -> None:
+        stepParticles(self.particles, dt, self.spatialHash)
+
+
+def oven_params(numParticles: int = 5, seed: int = 0, maxSpeed: float = 3.5) -> dict:
+    """ParticleSystem parameters of fullExp.first's oven, left of the magnets with Dot sized atoms."""
+    return dict(numParticles=numParticles, particleRadius=0.08, boundaryRadius=1.75, boundaryPosition=[-4.0, 0.0],
+                maxSpeed=maxSpeed, seed=seed)
+
+
+# Models the CLI can step, each gives (cls, params) for (numParticles, seed). "oven" is fullExp.first's oven and
+# "gas" and "events" are ParticleCollision's gas, so with the scene's N, seed and duration --bake writes the
+# trajectory the scene plays back
+MODELS = {
+    "oven": lambda n, seed: (ParticleSystem, oven_params(n, seed)),
+    "particles": lambda n, seed: (ParticleList, dict(numParticles=n, seed=seed)),
+    "gas": lambda n, seed: (VelocitySwapSystem, dict(numParticles=n, particleRadius=0.1, boundaryRadius=2, speed=2,
+                                                     seed=seed)),
+    "events": lambda n, seed: (EventDrivenSystem, dict(numParticles=n, particleRadius=0.1, boundaryRadius=2, speed=2,
+                                                       seed=seed)),
+    "drift": lambda n, seed: (OvenModel, dict(numParticles=n, seed=seed)),
+}
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Step a particle model headless and dump its final state.")
+    parser.add_argument("model", choices=MODELS, help="particle model to step")
+    parser.add_argument("-n", "--particles", type=int, default=100, help="number of particles (default: 100)")
+    parser.add_argument("-t", "--time", type=float, default=10, help="simulated seconds (default: 10)")
+    parser.add_argument("--dt", type=float, default=1 / 60, help="timestep in seconds (default: 1/60)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the final positions (and velocities, if any) to this .npz")
+    parser.add_argument("--bake", action="store_true", help="bake the whole trajectory into baked/ instead")
+    args = parser.parse_args(argv)
+
+    cls, params = MODELS[args.model](args.particles, args.seed)
+    start = time.perf_counter()
+    if args.bake:
+        # Same key as a scene baking cls with these params, so the scene replays this bake
+        trajectory = bake(cls, params, args.time, args.dt)
+        print(f"Baked {trajectory.shape[0]} frames of {args.particles} particles to {trajectory.filename} "
+              f"in {time.perf_counter() - start:.3f} s")
+        return
+
+    system = cls(**params)
+    steps = int(np.ceil(args.time / args.dt))
+    for _ in range(steps):
+        system.step(args.dt)
+    elapsed = time.perf_counter() - start
+
+    print(f"Stepped {args.particles} particles for {steps} steps in {elapsed:.3f} s "
+          f"({elapsed / steps * 1e3:.3f} ms per step)")
+
+    state = dict(positions=np.asarray(system.positions()))
+    for name in ("velocity", "direction"):
+        if hasattr(system, name):
+            state[name] = getattr(system, name)
+    if args.output:
+        np.savez(args.output, **state)
+    else:
+        np.savetxt(sys.stdout, state["positions"], fmt="%.6f")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Opt-in timing of updaters, play/wait calls, frames and LaTeX compiles.
+
+Scene modules call enable_from_env() after their imports, setting
+SCENE_PROFILE before rendering then turns it on:
+
+    SCENE_PROFILE=1 manim -ql SGExp.py quantizedMM            # print a report
+    SCENE_PROFILE=profile.json manim -ql SGExp.py quantizedMM  # write it as JSON
+
+When SCENE_PROFILE is not set nothing is patched, so there is no overhead.
+SCENE_PROFILE_TOP sets how many hot spots the report lists (default 15).
+Times are inclusive, e.g. a play contains the frames and updaters it ran.
+"""
+from manim import *
+from manim.mobject.text import tex_mobject
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter_ns
+from tex_cache import file_lock
+import json
+import os
+
+# name -> [count, total ns, max ns]
+records = defaultdict(lambda: [0, 0, 0])
+enabled = False
+
+
+def record(name: str, elapsed: int) -> None:
+    entry = records[name]
+    entry[0] += 1
+    entry[1] += elapsed
+    if elapsed > entry[2]:
+        entry[2] = elapsed
+
+
+def timed(name: str, function):
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(name, perf_counter_ns() - start)
+    wrapper.__wrapped__ = function
+    return wrapper
+
+
+class TimedUpdater:
+    """Updater wrapper that still compares equal to the function it wraps, so
+    remove_updater keeps working, and whose signature is the wrapped one, so
+    Mobject.update still passes dt when the updater asks for it.
+    """
+
+    def __init__(self, function) -> None:
+        self.__wrapped__ = function
+        self.name = "updater " + updater_name(function)
+
+    def __call__(self, *args):
+        start = perf_counter_ns()
+        try:
+            return self.__wrapped__(*args)
+        finally:
+            record(self.name, perf_counter_ns() - start)
+
+    def __eq__(self, other) -> bool:
+        return other is self or other is self.__wrapped__
+
+    def __hash__(self) -> int:
+        return hash(self.__wrapped__)
+
+
+def updater_name(function) -> str:
+    name = getattr(function, "__qualname__", type(function).__qualname__)
+    if name.endswith("<lambda>") and hasattr(function, "__code__"):
+        code = function.__code__
+        name += f" ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+def animation_name(args) -> str:
+    names = sorted({type(arg).__name__ for arg in args})
+    return "play " + ", ".join(names)
+
+
+def enable() -> None:
+    """Patches manim to record timings. Only call it once, before the scene is built."""
+    global enabled
+    if enabled:
+        return
+    enabled = True
+
+    add_updater = Mobject.add_updater
+
+    def timed_add_updater(self, update_function, *args, **kwargs):
+        if not isinstance(update_function, TimedUpdater):
+            update_function = TimedUpdater(update_function)
+        return add_updater(self, update_function, *args, **kwargs)
+
+    Mobject.add_updater = timed_add_updater
+
+    play = Scene.play
+
+    def timed_play(self, *args, **kwargs):
+        return timed(animation_name(args), play)(self, *args, **kwargs)
+
+    Scene.play = timed_play
+    Scene.wait = timed("wait", Scene.wait)
+    Scene.update_to_time = timed("frame: update mobjects", Scene.update_to_time)
+    tex_mobject.tex_to_svg_file = timed("tex compile", tex_mobject.tex_to_svg_file)
+
+    render = Scene.render
+
+    def timed_render(self, *args, **kwargs):
+        renderer = self.renderer
+        if not hasattr(renderer.render, "__wrapped__"):
+            renderer.render = timed("frame: rasterize", renderer.render)
+        # Scenes override construct, so it is timed on the instance
+        self.construct = timed("construct", self.construct)
+        try:
+            return timed("scene total", render)(self, *args, **kwargs)
+        finally:
+            report(type(self).__name__)
+            records.clear()
+
+    Scene.render = timed_render
+
+
+def report(scene_name: str, top: int = None, output: str = None) -> None:
+    """Prints the top hot spots by total time, or writes all of them to output as JSON."""
+    top = top or int(os.environ.get("SCENE_PROFILE_TOP", 15))
+    output = output or os.environ.get("SCENE_PROFILE", "1")
+    rows = sorted(records.items(), key=lambda item: item[1][1], reverse=True)
+
+    if output.endswith(".json"):
+        # render_all workers may finish at the same time, each adds its scene under the lock
+        with file_lock(Path(output + ".lock")):
+            data = json.loads(Path(output).read_text()) if os.path.exists(output) else {}
+            data[scene_name] = {name: dict(count=count, total_ms=total / 1e6, max_ms=longest / 1e6)
+                                for name, (count, total, longest) in rows}
+            Path(output).write_text(json.dumps(data, indent=2))
+        return
+
+    print(f"\nProfile of {scene_name}")
+    print(f"{'':<50}{'count':>8}{'total ms':>12}{'mean ms':>10}{'max ms':>10}")
+    for name, (count, total, longest) in rows[:top]:
+        print(f"{name[:50]:<50}{count:>8}{total / 1e6:>12.1f}{total / count / 1e6:>10.2f}{longest / 1e6:>10.2f}")
+
+
+def enable_from_env() -> None:
+    """Calls enable() if SCENE_PROFILE is set."""
+    if os.environ.get("SCENE_PROFILE"):
+        enable()
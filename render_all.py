@@ -0,0 +1,151 @@
+import argparse
+import importlib
+import inspect
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Tuple
+
+try:
+    import resource
+except ImportError:
+    # Windows has no getrusage, peak RSS is then not reported
+    resource = None
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+QUALITIES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+
+
+def find_scenes(module_names: List[str] = None) -> List[Tuple[str, str]]:
+    """Returns (module, scene) for every Scene subclass defined in the project modules.
+
+    Scenes that a module only imports are listed once, under the module that defines them.
+    """
+    from manim import Scene
+
+    if module_names is None:
+        module_names = sorted(path.stem for path in PROJECT_DIR.glob("*.py") if path.stem != Path(__file__).stem)
+
+    scenes = []
+    for module_name in module_names:
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as error:
+            print(f"Skipping {module_name}: {error!r}", file=sys.stderr)
+            continue
+
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, Scene) and cls.__module__ == module_name:
+                scenes.append((module_name, name))
+    return scenes
+
+
+def render_scene(module_name: str, scene_name: str, quality: str, media_dir: str) -> Tuple[float, int]:
+    """Renders one scene in the current process and returns (wall seconds, peak RSS in bytes or None)."""
+    from manim import config
+    import profiling
+    import tex_cache
+
+    profiling.enable_from_env()
+    # Every worker shares media_dir, so LaTeX must not clean up or compile over another worker's files
+    config.quality = quality
+    config.media_dir = media_dir
+    config.input_file = str(PROJECT_DIR / f"{module_name}.py")
+    config.no_latex_cleanup = True
+    tex_cache.lock_tex_compiles()
+
+    start = time.perf_counter()
+    scene = getattr(importlib.import_module(module_name), scene_name)
+    scene().render()
+    wall = time.perf_counter() - start
+    if resource is None:
+        return wall, None
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return wall, peak if sys.platform == "darwin" else peak * 1024
+
+
+def mebibytes(peak: int) -> str:
+    return "-" if peak is None else f"{peak / 2 ** 20:.0f}"
+
+
+def render_all(scenes: List[Tuple[str, str]], quality: str, media_dir: str, jobs: int = None) -> bool:
+    """Renders every scene in its own worker process and prints wall time and
+    peak RSS per scene. Returns False if any scene failed.
+    """
+    # One fresh process per scene, so the peak RSS belongs to that scene alone
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    start = time.perf_counter()
+
+    # max_tasks_per_child needs Python 3.11, before that a worker's peak RSS can include earlier scenes
+    fresh = dict(max_tasks_per_child=1) if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), mp_context=context, **fresh) as pool:
+        futures = {
+            pool.submit(render_scene, module_name, scene_name, quality, media_dir): (module_name, scene_name)
+            for module_name, scene_name in scenes
+        }
+        for future in as_completed(futures):
+            module_name, scene_name = futures[future]
+            try:
+                wall, peak = results[(module_name, scene_name)] = future.result()
+                print(f"Rendered {module_name}.{scene_name} in {wall:.1f} s, peak RSS {mebibytes(peak)} MiB")
+            except Exception:
+                print(f"Failed to render {module_name}.{scene_name}:", file=sys.stderr)
+                traceback.print_exc()
+
+    total = time.perf_counter() - start
+    print()
+    print(f"{'scene':<40}{'wall (s)':>10}{'peak RSS (MiB)':>16}")
+    for module_name, scene_name in scenes:
+        if (module_name, scene_name) in results:
+            wall, peak = results[(module_name, scene_name)]
+            print(f"{module_name + '.' + scene_name:<40}{wall:>10.1f}{mebibytes(peak):>16}")
+        else:
+            print(f"{module_name + '.' + scene_name:<40}{'failed':>10}")
+
+    serial = sum(wall for wall, _ in results.values())
+    print(f"\n{len(results)}/{len(scenes)} scenes in {total:.1f} s wall, {serial:.1f} s if rendered one by one")
+    return len(results) == len(scenes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render every scene of the project in parallel, one scene per process.")
+    parser.add_argument("scenes", nargs="*", help="scene or module names to render, e.g. SGExp or fig1_3a (default: all)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("-q", "--quality", choices=QUALITIES, default="l", help="manim quality flag (default: l)")
+    parser.add_argument("--profile", nargs="?", const="1", metavar="JSON",
+                        help="print a timing report per scene, or write the reports to this .json file")
+    parser.add_argument("--media-dir", default=str(PROJECT_DIR / "media"),
+                        help="media dir shared by all workers, including the Tex/Text cache")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_DIR)
+    sys.path.insert(0, str(PROJECT_DIR))
+    if args.profile:
+        # Read by profiling.enable_from_env in the workers
+        os.environ["SCENE_PROFILE"] = args.profile
+    scenes = find_scenes()
+    if args.scenes:
+        scenes = [scene for scene in scenes if scene[0] in args.scenes or scene[1] in args.scenes]
+    if not scenes:
+        sys.exit("No scenes to render")
+
+    ok = render_all(scenes, QUALITIES[args.quality], args.media_dir, args.jobs)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
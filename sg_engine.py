@@ -0,0 +1,114 @@
+import numpy as np
+from typing import List, Tuple
+
+# Named analyzer directions, as used in the SG\hat{x} / SG\hat{z} boxes
+AXES = {
+    "x": np.array([1.0, 0.0, 0.0]),
+    "y": np.array([0.0, 1.0, 0.0]),
+    "z": np.array([0.0, 0.0, 1.0]),
+}
+
+
+def eigenstates(axis) -> Tuple[np.array, np.array]:
+    """Returns |n,+> and |n,-> in the z basis for the direction n.
+
+    axis is either one of "x", "y", "z" or any 3-vector.
+    """
+    n = AXES[axis] if isinstance(axis, str) else np.asarray(axis, dtype=np.float64)
+    n = n / np.linalg.norm(n)
+    theta = np.arccos(np.clip(n[2], -1.0, 1.0))
+    phi = np.arctan2(n[1], n[0])
+
+    plus = np.array([np.cos(theta / 2), np.exp(1j * phi) * np.sin(theta / 2)])
+    minus = np.array([np.sin(theta / 2), -np.exp(1j * phi) * np.cos(theta / 2)])
+    return plus, minus
+
+
+def spin_states(axis, sign: str, n: int) -> np.array:
+    """Returns an (n, 2) ensemble of atoms all in |axis,sign>, e.g. spin_states("z", "+", 10)."""
+    plus, minus = eigenstates(axis)
+    return np.tile(plus if sign == "+" else minus, (n, 1))
+
+
+def random_states(n: int, rng: np.random.Generator = None) -> np.array:
+    """Returns n spin states uniformly distributed on the Bloch sphere, which is
+    what an unpolarized beam from the oven looks like to any analyzer.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    states = rng.standard_normal((n, 2)) + 1j * rng.standard_normal((n, 2))
+    return states / np.linalg.norm(states, axis=1, keepdims=True)
+
+
+class Analyzer:
+    """One Stern-Gerlach apparatus along axis. block is None, "+" or "-" and
+    names the outgoing beam that is stopped, like the hatched obstacle in fig1_3a.
+    """
+
+    def __init__(self, axis, block: str = None) -> None:
+        if block not in (None, "+", "-"):
+            raise ValueError(f"block must be None, '+' or '-', not {block!r}")
+        self.axis = axis
+        self.block = block
+
+
+class StageResult:
+    """Outcome of one analyzer: how many atoms went up and down, and the indices
+    (into the original ensemble) of the atoms that continue to the next stage.
+    """
+
+    def __init__(self, up: int, down: int, survivors: np.array) -> None:
+        self.up = up
+        self.down = down
+        self.survivors = survivors
+
+    def __repr__(self) -> str:
+        return f"StageResult(up={self.up}, down={self.down}, survivors={len(self.survivors)})"
+
+
+def run_chain(states: np.array, analyzers: List[Analyzer], rng: np.random.Generator = None) -> List[StageResult]:
+    """Sends an (N, 2) complex ensemble of normalized spin states through a chain
+    of analyzers and samples every outcome with the Born rule.
+
+    Only the first stage needs the full amplitudes. After a measurement each atom
+    is in an eigenstate of that analyzer, so later stages just keep one bool per
+    atom and look the probability up from the overlap of the two eigenbases.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    survivors = np.arange(len(states))
+    results = []
+    up = None
+    previous = None
+
+    for analyzer in analyzers:
+        plus, minus = eigenstates(analyzer.axis)
+
+        if previous is None:
+            amplitude = states @ plus.conj()
+            probability_up = amplitude.real ** 2 + amplitude.imag ** 2
+        else:
+            previous_plus, previous_minus = previous
+            probability_up = np.where(up, abs(np.vdot(plus, previous_plus)) ** 2,
+                                      abs(np.vdot(plus, previous_minus)) ** 2)
+
+        up = rng.random(len(probability_up)) < probability_up
+        up_count = int(np.count_nonzero(up))
+
+        if analyzer.block == "+":
+            keep = ~up
+        elif analyzer.block == "-":
+            keep = up
+        else:
+            keep = None
+
+        if keep is not None:
+            survivors = survivors[keep]
+            up = up[keep]
+
+        results.append(StageResult(up_count, len(probability_up) - up_count, survivors))
+        previous = (plus, minus)
+
+    return results
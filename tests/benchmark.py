@@ -0,0 +1,219 @@
+"""
+Benchmarks for the physics steppers and for building the scenes.
+
+    python tests/benchmark.py -o bench.json                   # run and save
+    python tests/benchmark.py --baseline bench.json           # run and compare
+
+Times are seconds per call (best of --repeat). A benchmark that got more than
+--threshold times slower than the baseline is flagged and the exit code is 1.
+The physics benchmarks only need NumPy, the magnet and scene benchmarks are
+skipped when manim can't be imported.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from physics import OvenAtoms, OvenModel, ParticleList
+from particle_system import ParticleSystem, VelocitySwapSystem
+import field
+import deflection
+
+SIZES = [10, 100, 1000, 10000]
+SG_SCENES = ["quantizedMM", "fig1_3a", "fig1_3b", "fig1_3c"]
+
+
+def time_call(function: Callable[[], None], repeat: int, min_time: float = 0.2) -> float:
+    """Returns the best time per call, calling function often enough per
+    repeat that each measurement takes at least min_time.
+    """
+    start = time.perf_counter()
+    function()
+    number = max(1, int(min_time / max(time.perf_counter() - start, 1e-9)))
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def boundary_for(n: int, particleRadius: float) -> float:
+    # Keep the gas at about 20% area fraction so every size collides about as often
+    return max(1.75, particleRadius * np.sqrt(n / 0.2))
+
+
+def physics_benchmarks(sizes) -> Dict[str, Callable[[], Callable[[], None]]]:
+    """Returns name -> setup, where setup builds a fresh model and returns the call to time."""
+    benchmarks = {}
+    dt = 1 / 60
+    for n in sizes:
+        def particle_list(n=n):
+            # fullExp.Particle with the SpatialHash broad phase
+            system = ParticleList(n, particleRadius=0.12, boundaryRadius=boundary_for(n, 0.12), seed=0)
+            return lambda: system.step(dt)
+
+        def particle_system(n=n):
+            system = ParticleSystem(n, 0.12, boundary_for(n, 0.12), (0, 0), seed=0)
+            return lambda: system.step(dt)
+
+        def velocity_swap(n=n):
+            # ParticleCollision's gas, formerly update_positions
+            system = VelocitySwapSystem(n, 0.1, boundary_for(n, 0.1), 2, seed=0)
+            return lambda: system.step(dt)
+
+        def oven_atoms(n=n):
+            # The oven stepped one OvenAtom at a time, as SGExp.Particle did before OvenModel
+            system = OvenAtoms(n, seed=0)
+            return lambda: system.step(dt)
+
+        def oven_model(n=n):
+            # SGExp.Oven's atoms, all stepped as arrays
+            system = OvenModel(n, seed=0)
+            return lambda: system.step(dt)
+
+        benchmarks[f"fullExp.Particle step N={n}"] = particle_list
+        benchmarks[f"ParticleSystem step N={n}"] = particle_system
+        benchmarks[f"ParticleCollision step N={n}"] = velocity_swap
+        benchmarks[f"SGExp.Particle update_position N={n}"] = oven_atoms
+        benchmarks[f"SGExp.Oven OvenModel step N={n}"] = oven_model
+
+        def thermal_beam(n=n):
+            # A whole beam of shot atoms through the magnet, fullExp's curves are one small batch of these
+            magnet = deflection.GradientMagnet()
+            positions, velocities, spins = deflection.thermal_beam(n, 3.5, seed=0)
+            return lambda: deflection.integrate(positions, velocities, spins, magnet, 2)
+
+        benchmarks[f"deflection.integrate N={n}"] = thermal_beam
+
+    def field_lines():
+        # InhomogenousMagnetiField's lines, traced without the cache
+        magnet = field.sg_magnet()
+        seeds = magnet.seeds(300)
+        return lambda: field.streamlines(magnet, seeds)
+
+    benchmarks["field.streamlines 300 lines"] = field_lines
+    return benchmarks
+
+
+def manim_benchmarks(scenes) -> Dict[str, Callable[[], Callable[[], None]]]:
+    try:
+        from manim import tempconfig
+    except ImportError as error:
+        print(f"Skipping magnet and scene benchmarks: {error}", file=sys.stderr)
+        return {}
+
+    import components
+    import tex_cache
+
+    def clear_caches():
+        # Build from scratch, scenes pay this once per process and then only copy
+        components._prototypes.clear()
+        tex_cache._prototypes.clear()
+        tex_cache._futures.clear()
+
+    def magnets():
+        from Magnets import create_magnets
+
+        def run():
+            clear_caches()
+            create_magnets()
+        return run
+
+    def magnets_copy():
+        from Magnets import create_magnets
+        create_magnets()
+        return create_magnets
+
+    benchmarks = {"Magnets.createMagnets": magnets, "Magnets.createMagnets cached": magnets_copy}
+
+    for scene_name in scenes:
+        def construct(scene_name=scene_name):
+            import SGExp
+
+            def run():
+                clear_caches()
+                # Animations are skipped and nothing is written, so this is only the construct() work
+                with tempconfig({"dry_run": True, "disable_caching": True, "verbosity": "ERROR"}):
+                    scene = getattr(SGExp, scene_name)(skip_animations=True)
+                    scene.setup()
+                    scene.construct()
+            return run
+
+        benchmarks[f"SGExp.{scene_name}.construct"] = construct
+    return benchmarks
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> bool:
+    """Prints every result next to its baseline and returns False if any regressed."""
+    ok = True
+    print(f"\n{'benchmark':<45}{'baseline':>12}{'now':>12}{'ratio':>8}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<45}{'-':>12}{seconds * 1e3:>10.3f}ms")
+            continue
+        ratio = seconds / baseline[name]
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:<45}{baseline[name] * 1e3:>10.3f}ms{seconds * 1e3:>10.3f}ms{ratio:>8.2f}{flag}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark physics stepping and scene construction.")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("-n", "--sizes", type=int, nargs="+", default=SIZES, help="particle counts")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="measurements per benchmark, the best is kept")
+    parser.add_argument("-o", "--output", help="save the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="flag benchmarks slower than threshold x baseline (default: 1.25)")
+    parser.add_argument("--no-manim", action="store_true", help="only run the physics benchmarks")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_DIR)
+    benchmarks = physics_benchmarks(args.sizes)
+    if not args.no_manim:
+        benchmarks.update(manim_benchmarks(SG_SCENES))
+
+    results = {}
+    for name, setup in benchmarks.items():
+        if args.filter not in name:
+            continue
+        results[name] = time_call(setup(), args.repeat)
+        print(f"{name:<45}{results[name] * 1e3:>10.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "meta": {
+                    "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.platform(),
+                },
+                "results": results,
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
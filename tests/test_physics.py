@@ -0,0 +1,227 @@
+"""
+Headless checks of the claims the physics modules make about each other.
+
+    python -m pytest -q tests
+
+Only NumPy is needed, nothing here imports manim.
+"""
+
+import copy
+import os
+import sys
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from bake import FixedTimestep, TrajectoryPlayback, bake
+import deflection
+import field
+from particle_system import EventDrivenSystem, ParticleSystem, VelocitySwapSystem, neighbourPairs
+from physics import OvenAtoms, OvenModel, ParticleList, SpatialHash, stepParticles
+from sg_engine import Analyzer, random_states, run_chain, spin_states
+import vector_helpers
+
+
+def brute_force_pairs(position: np.array, distance: float) -> set:
+    i, j = np.triu_indices(len(position), 1)
+    close = np.linalg.norm(position[i] - position[j], axis=1) < distance
+    return set(zip(i[close].tolist(), j[close].tolist()))
+
+
+def test_spatial_hash_finds_every_touching_pair():
+    particles = ParticleList(300, particleRadius=0.05, boundaryRadius=1.75, seed=1).particles
+    spatialHash = SpatialHash(0.05)
+    spatialHash.build(particles)
+    candidates = spatialHash.candidatePairs()
+
+    assert len(candidates) == len(set(candidates))
+    position = np.array([particle.position for particle in particles])
+    assert brute_force_pairs(position, 4 * 0.05) <= set(candidates)
+
+
+def test_spatial_hash_steps_like_all_pairs():
+    hashed = ParticleList(60, particleRadius=0.12, boundaryRadius=1.75, seed=2)
+    allPairs = copy.deepcopy(hashed.particles)
+    for _ in range(120):
+        hashed.step(1 / 60)
+        stepParticles(allPairs, 1 / 60)
+
+    np.testing.assert_array_equal(hashed.positions(), [particle.position for particle in allPairs])
+
+
+def test_neighbour_pairs_match_brute_force():
+    position = np.random.default_rng(3).uniform(-2, 2, (500, 2))
+    i, j = neighbourPairs(position, 0.2)
+    pairs = [(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())]
+
+    assert len(pairs) == len(set(pairs))
+    assert brute_force_pairs(position, 0.2) <= set(pairs)
+
+
+def test_event_driven_system_conserves_energy_and_never_overlaps():
+    system = EventDrivenSystem(100, particleRadius=0.05, boundaryRadius=2, speed=2, seed=4)
+    radius = system.particleRadius
+    # The random start has overlapping atoms, which may stay overlapped until they separate, so start on a grid
+    x, y = np.meshgrid(np.linspace(-1.2, 1.2, 10), np.linspace(-1.2, 1.2, 10))
+    system.position = np.column_stack((x.ravel(), y.ravel()))
+    system.rebuild()
+    energy = np.sum(system.velocity ** 2)
+
+    for _ in range(120):
+        system.step(1 / 30)
+        position = system.positions()
+        assert not brute_force_pairs(position, 2 * radius - 1e-9)
+        assert np.all(np.linalg.norm(position, axis=1) <= system.boundaryRadius - radius + 1e-9)
+
+    np.testing.assert_allclose(np.sum(system.velocity ** 2), energy, rtol=1e-9)
+
+
+def test_event_driven_system_is_independent_of_dt():
+    coarse = EventDrivenSystem(100, particleRadius=0.05, boundaryRadius=2, speed=2, seed=5)
+    fine = EventDrivenSystem(100, particleRadius=0.05, boundaryRadius=2, speed=2, seed=5)
+    for _ in range(10):
+        coarse.step(1 / 10)
+    for _ in range(60):
+        fine.step(1 / 60)
+
+    np.testing.assert_allclose(coarse.positions(), fine.positions(), atol=1e-9)
+
+
+def test_fixed_timestep_plays_back_like_a_bake(tmp_path):
+    params = dict(numParticles=50, particleRadius=0.1, boundaryRadius=2, speed=2, seed=6)
+    playback = TrajectoryPlayback(bake(VelocitySwapSystem, params, 2, directory=str(tmp_path)))
+    live = FixedTimestep(VelocitySwapSystem(**params))
+
+    # A 24 fps render of a 60 Hz simulation, the frames fall between the physics steps
+    for _ in range(40):
+        playback.step(1 / 24)
+        live.step(1 / 24)
+        np.testing.assert_allclose(live.positions(), playback.positions(), atol=1e-12)
+
+
+def test_oven_model_matches_oven_atoms():
+    atoms = OvenAtoms(40, ovenRadius=1.5, ovenCenter=(1, -1, 0), seed=7)
+    model = OvenModel(40, ovenRadius=1.5, ovenCenter=(1, -1, 0), seed=7)
+    for dt in np.random.default_rng(8).uniform(0.01, 0.4, 100):
+        atoms.step(dt)
+        model.step(dt)
+        np.testing.assert_allclose(model.positions(), atoms.positions(), atol=1e-12)
+
+
+def scalar_quadrant(v, xOffset=0, yOffset=0):
+    # vector_helpers.findQuadtrant before the batch API, one vector at a time
+    isUp, isRight = v[1] > yOffset, v[0] > xOffset
+    if isUp and isRight:
+        return 0
+    elif isUp:
+        return 1
+    elif not isRight:
+        return 2
+    return 3
+
+
+def scalar_angle(v1, v2):
+    v1_u, v2_u = v1 / np.linalg.norm(v1), v2 / np.linalg.norm(v2)
+    return np.arccos(np.clip(np.dot(v1_u, v2_u), -1.0, 1.0))
+
+
+def test_vector_batches_match_the_scalar_helpers():
+    rng = np.random.default_rng(9)
+    axes = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1]], dtype=np.float64)
+    vectors = np.concatenate((rng.uniform(-1, 1, (200, 3)), axes, np.zeros((1, 3))))
+    others = np.concatenate((rng.uniform(-1, 1, (200, 3)), axes[::-1], axes[:1]))
+
+    for offset in [(0, 0), (0.2, -0.3)]:
+        quadrants = vector_helpers.find_quadrants(vectors, *offset)
+        np.testing.assert_array_equal(quadrants, [scalar_quadrant(v, *offset) for v in vectors])
+        np.testing.assert_array_equal(quadrants, [vector_helpers.findQuadtrant(v, *offset) for v in vectors])
+
+    # The zero vector has no direction, both give NaN for it
+    with np.errstate(divide="ignore", invalid="ignore"):
+        units = vector_helpers.unit_vectors(vectors)
+        np.testing.assert_allclose(units, [v / np.linalg.norm(v) for v in vectors], rtol=1e-15)
+        np.testing.assert_array_equal(units, [vector_helpers.unit_vector(v) for v in vectors])
+
+        angles = vector_helpers.angles_between(vectors, others)
+        np.testing.assert_allclose(angles, [scalar_angle(a, b) for a, b in zip(vectors, others)], rtol=1e-12)
+        np.testing.assert_array_equal(angles, [vector_helpers.angle_between(a, b) for a, b in zip(vectors, others)])
+
+
+def test_run_chain_follows_the_born_rule():
+    n = 200000
+    rng = np.random.default_rng(10)
+    # |n,+> for n between x and y is measured up along x with probability cos^2(pi / 8)
+    (stage,) = run_chain(spin_states([1, 1, 0], "+", n), [Analyzer("x")], rng)
+    assert abs(stage.up / n - np.cos(np.pi / 8) ** 2) < 4 * np.sqrt(0.25 / n)
+
+    # fig1_3c: keep z+, keep x+, then z comes out half and half again
+    first, second, third = run_chain(random_states(n, rng), [Analyzer("z", block="-"), Analyzer("x", block="-"),
+                                                             Analyzer("z")], rng)
+    assert abs(first.up / n - 0.5) < 4 * np.sqrt(0.25 / n)
+    assert second.up + second.down == first.up
+    assert len(second.survivors) == second.up
+    assert abs(third.up / second.up - 0.5) < 4 * np.sqrt(0.25 / second.up)
+
+    # Measuring along the axis the atoms were prepared in always gives the same answer
+    (stage,) = run_chain(spin_states("z", "-", 1000), [Analyzer("z")], rng)
+    assert stage.down == 1000
+
+
+def test_pole_pair_field_matches_quadrature():
+    magnet = field.sg_magnet()
+    points = np.array([[0, 0, 0], [0.3, -0.2, 0], [1, 0.2, 0], [-4, 0, 0], [0, 4, 0], [3.5, -2, 0]], dtype=np.float64)
+
+    # The poles' charge summed as many point charges along every edge, midpoint rule
+    expected = np.zeros((len(points), 2))
+    t = (np.arange(4000) + 0.5) / 4000
+    for polygon, sign in ((magnet.north, 1), (magnet.south, -1)):
+        starts, ends = polygon[:, :2], np.roll(polygon[:, :2], -1, axis=0)
+        lengths = np.linalg.norm(ends - starts, axis=1)
+        for start, end, length in zip(starts, ends, lengths):
+            r = points[:, None, :2] - (start + t[:, None] * (end - start))
+            charge = sign * magnet.strength / lengths.sum() * length / len(t)
+            expected += charge * np.sum(r / np.sum(r * r, axis=2, keepdims=True), axis=1) / (2 * np.pi)
+
+    b = magnet.field(points)
+    np.testing.assert_allclose(b[:, :2], expected, atol=1e-8)
+    assert np.all(b[:, 2] == 0)
+
+
+def test_streamlines_end_on_the_south_pole():
+    magnet = field.sg_magnet()
+    seeds = magnet.seeds(60)
+    ends = np.array([line[-1] for line in field.streamlines(magnet, seeds)])
+    onSouth = field.inside_polygon(ends, magnet.south)
+    leftBounds = (np.abs(ends[:, 0]) > 7.5) | (np.abs(ends[:, 1]) > 4.5)
+
+    assert np.all(onSouth | leftBounds)
+    # Every line leaving the knife edge into the gap crosses it
+    gap = (seeds[:, 1] < 1.3) & (np.abs(seeds[:, 0]) < 2.5)
+    assert gap.any() and np.all(onSouth[gap])
+
+
+def test_gradient_magnet_deflects_like_the_old_parabola():
+    # fullExp.first's magnet and atom speed
+    magnet = deflection.GradientMagnet(start=2.5, end=2.5 + 3.5 * 0.65)
+    up, down, straight = deflection.deflection_library((1, -1, 0), 3.5, 7, magnet)
+
+    for curve, sign in ((up, 1), (down, -1)):
+        x, y = curve.points[:, 0], curve.points[:, 1]
+        # Inside the magnet the on-axis force gives the old 0.1 * (x - 2.5) ** 2, the knife edge adds a little
+        inside = (x > magnet.start) & (x < magnet.end)
+        np.testing.assert_allclose(y[inside], sign * 0.1 * (x[inside] - 2.5) ** 2, atol=0.01)
+        # After the magnet the atom drifts on the tangent instead of following the parabola to 2.025 at x = 7
+        length = magnet.end - magnet.start
+        assert abs(x[-1] - 7) < 1e-9
+        assert abs(y[-1] - sign * (0.1 * length ** 2 + 0.2 * length * (7 - magnet.end))) < 0.03 * abs(y[-1])
+
+    np.testing.assert_array_equal(straight.points[:, 1], 0)
+
+
+def test_particle_system_steps_with_too_few_atoms():
+    for n in (0, 1):
+        system = ParticleSystem(n, 0.12, 1.75, (0, 0), seed=11)
+        system.step(1 / 60)
+        assert system.positions().shape == (n, 2)
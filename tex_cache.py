@@ -0,0 +1,266 @@
+from manim import *
+from manim.mobject.text import tex_mobject
+from manim.utils.tex_file_writing import generate_tex_file, tex_hash
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+import inspect
+import os
+import re
+import subprocess
+import threading
+
+try:
+    from manim.utils.tex_file_writing import make_tex_compilation_command
+except ImportError:
+    # manim < 0.19 only has tex_compilation_command, which returns a shell string
+    make_tex_compilation_command = None
+
+try:
+    import fcntl
+except ImportError:
+    # No cross-process locking on Windows, only between threads
+    fcntl = None
+
+# Fully built Tex/MathTex mobjects, keyed by Fragment.key
+_prototypes = {}
+# Batched LaTeX runs started by prefetch, keyed by the Fragment.key of every fragment they compile
+_futures = {}
+_executor: ThreadPoolExecutor = None
+
+
+class Fragment:
+    """Declaration of a Tex/MathTex mobject that is compiled once per render.
+
+    Fragments with the same class, tex strings, isolated substrings, color map
+    and keyword arguments share one prototype, and build() hands out copies of
+    it. colors maps a substring to the color it gets via set_color_by_tex, e.g.
+
+        Fragment(MathTex, r"|z,+\\rangle", isolate=["z"], colors={"z": YELLOW}, color=BLUE)
+    """
+
+    def __init__(self, cls, *tex_strings: str, isolate=(), colors: dict = None, **kwargs) -> None:
+        self.cls = cls
+        self.tex_strings = tex_strings
+        self.isolate = tuple(isolate)
+        self.colors = dict(colors or {})
+        self.kwargs = kwargs
+        self.key = (cls.__name__, tex_strings, self.isolate, tuple((k, str(v)) for k, v in self.colors.items()),
+                    tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+
+    def create_kwargs(self) -> dict:
+        kwargs = dict(self.kwargs)
+        if self.isolate:
+            kwargs["substrings_to_isolate"] = list(self.isolate)
+        return kwargs
+
+    def create(self) -> Mobject:
+        mob = self.cls(*self.tex_strings, **self.create_kwargs())
+        for substring, color in self.colors.items():
+            mob.set_color_by_tex(substring, color)
+        return mob
+
+    def build(self) -> Mobject:
+        if self.key not in _prototypes:
+            future = _futures.pop(self.key, None)
+            # Blocks here if the fragment's svgs are still being compiled, the mobject is always built here
+            if future is not None:
+                future.result()
+            _prototypes[self.key] = self.create()
+        return _prototypes[self.key].copy()
+
+
+def build_all(fragments) -> list:
+    return [fragment.build() for fragment in fragments]
+
+
+def prefetch(fragments) -> None:
+    """Starts compiling the svgs of the given Tex/MathTex fragments in one
+    batched LaTeX run in a background thread and returns at once.
+
+    Only LaTeX runs in the background. Building mobjects isn't thread-safe,
+    so build() still creates every mobject on the scene's thread and only
+    waits if the batch isn't done yet. Call it at the top of construct()
+    and build the geometry before the text.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+        lock_tex_compiles()
+
+    fragments = [f for f in {f.key: f for f in fragments}.values() if f.key not in _prototypes and f.key not in _futures]
+    latex = [f for f in fragments if issubclass(f.cls, SingleStringMathTex)]
+    if latex:
+        batch = _executor.submit(compile_fragments, latex)
+        for fragment in latex:
+            _futures[fragment.key] = batch
+
+
+def lock_tex_compiles() -> None:
+    """Makes sure two threads, or two render processes sharing a media dir,
+    never run LaTeX on the same expression at once, since both would write the
+    same files in the tex directory. Whoever comes second finds the svg and
+    just loads it. Safe to call more than once.
+    """
+    tex_to_svg_file = tex_mobject.tex_to_svg_file
+    if getattr(tex_to_svg_file, "locked", False):
+        return
+    locks = defaultdict(threading.Lock)
+    locks_lock = threading.Lock()
+
+    def locked_tex_to_svg_file(expression, environment=None, tex_template=None):
+        with locks_lock:
+            lock = locks[(expression, environment)]
+        lock_dir = Path(config.get_dir("tex_dir"))
+        with lock, file_lock(lock_dir / f"{tex_hash(f'{environment}{expression}')}.lock"):
+            return tex_to_svg_file(expression, environment=environment, tex_template=tex_template)
+
+    locked_tex_to_svg_file.locked = True
+    tex_mobject.tex_to_svg_file = locked_tex_to_svg_file
+
+
+@contextmanager
+def file_lock(path: Path):
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def compile_fragments(fragments) -> None:
+    """Compiles every expression the given fragments need in one LaTeX run.
+
+    Each expression becomes one page of a single document and dvisvgm writes
+    every page straight to the svg file manim looks for, so building the
+    fragments afterwards only loads svgs. Anything that can't be batched
+    (custom document classes, a failing compile, manim internals that changed)
+    is left for manim to compile on its own as usual.
+    """
+    pending = {}
+    for fragment in fragments:
+        if fragment.key in _prototypes or not issubclass(fragment.cls, SingleStringMathTex):
+            continue
+        try:
+            for expression, environment, template in _collect_expressions(fragment):
+                tex_file = Path(generate_tex_file(expression, environment, template))
+                if not tex_file.with_suffix(".svg").exists():
+                    pending.setdefault(id(template), (template, {}))[1][tex_file] = None
+        except Exception as error:
+            # Only a head start, build() still compiles whatever is missing
+            logger.debug(f"Can't batch {fragment.tex_strings}: {error!r}")
+
+    for template, tex_files in pending.values():
+        try:
+            _compile_batch(template, list(tex_files))
+        except Exception as error:
+            logger.debug(f"Batched LaTeX run failed: {error!r}, compiling one by one")
+
+
+def _collect_expressions(fragment: Fragment) -> list:
+    """Returns (expression, environment, template) for every svg the fragment
+    would ask manim for: the whole string of a MathTex/Tex and each of its
+    parts. Nothing is compiled or built, the strings go through the same
+    private helpers manim uses on them, so a manim version that changed them
+    raises here.
+    """
+    recorded = []
+    cls = fragment.cls
+    # Defaults of the class itself win over those of its bases, e.g. Tex's tex_environment
+    options = {}
+    for base in reversed(cls.__mro__):
+        if "__init__" in vars(base):
+            for name, parameter in inspect.signature(base.__init__).parameters.items():
+                if parameter.default is not inspect.Parameter.empty:
+                    options[name] = parameter.default
+    options.update(fragment.create_kwargs())
+    template = options.get("tex_template") or config["tex_template"]
+
+    # Not initialised, it only lends manim's string helpers
+    helper = cls.__new__(cls)
+    strings = list(fragment.tex_strings)
+    if issubclass(cls, MathTex):
+        helper.substrings_to_isolate = options.get("substrings_to_isolate") or []
+        helper.tex_to_color_map = options.get("tex_to_color_map") or {}
+        parts = helper._break_up_tex_strings(strings)
+        strings = [options["arg_separator"].join(parts), *parts]
+    for string in strings:
+        recorded.append((helper._get_modified_expression(string), options["tex_environment"], template))
+    return recorded
+
+
+def _compile_batch(template, tex_files: list) -> None:
+    if not tex_files:
+        return
+
+    headers, bodies = set(), []
+    for tex_file in tex_files:
+        header, body = tex_file.read_text(encoding="utf-8").split(r"\begin{document}", 1)
+        headers.add(header)
+        bodies.append(body.rsplit(r"\end{document}", 1)[0])
+
+    # One preview environment per page gives the same tight box as standalone's preview option
+    header = headers.pop()
+    if headers or not re.search(r"\\documentclass\[preview\]\{standalone\}", header):
+        return
+    header = header.replace(r"\documentclass[preview]{standalone}",
+                            "\\documentclass{article}\n\\usepackage[active,tightpage]{preview}\n\\pagestyle{empty}")
+
+    document = header + "\\begin{document}\n" + "".join(
+        f"\\begin{{preview}}{body}\\end{{preview}}\n" for body in bodies) + "\\end{document}\n"
+
+    tex_dir = tex_files[0].parent
+    batch_file = tex_dir / f"batch_{tex_hash(document)}.tex"
+    with file_lock(batch_file.with_suffix(".lock")):
+        # Another render process may have compiled the same batch in the meantime
+        if all(tex_file.with_suffix(".svg").exists() for tex_file in tex_files):
+            return
+        batch_file.write_text(document, encoding="utf-8")
+        _run_batch(template, batch_file, tex_files)
+
+
+def _compilation_command(template, tex_file: Path, tex_dir: Path) -> list:
+    if make_tex_compilation_command is not None:
+        return make_tex_compilation_command(template.tex_compiler, template.output_format, tex_file, tex_dir)
+    # The same arguments manim 0.18's tex_compilation_command puts in its shell string
+    if template.tex_compiler == "xelatex":
+        flags = ["-no-pdf"] if template.output_format == ".xdv" else []
+    else:
+        flags = [f"-output-format={template.output_format[1:]}"]
+    return [template.tex_compiler, *flags, "-interaction=batchmode", "-halt-on-error",
+            f"-output-directory={tex_dir.as_posix()}", tex_file.as_posix()]
+
+
+def _run_batch(template, batch_file: Path, tex_files: list) -> None:
+    tex_dir = batch_file.parent
+
+    # A failed batch is not fatal, manim then compiles every expression on its own and reports the error
+    output_file = batch_file.with_suffix(template.output_format)
+    result = subprocess.run(_compilation_command(template, batch_file, tex_dir),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode != 0 or not output_file.exists():
+        logger.debug(f"Batched LaTeX run for {batch_file} failed, compiling one by one")
+        return
+
+    pages = batch_file.with_name(batch_file.stem + "-%p.svg")
+    result = subprocess.run([
+        "dvisvgm",
+        *(["--pdf"] if template.output_format == ".pdf" else []),
+        "-p", "1-",
+        output_file.as_posix(),
+        "-n",
+        "-v", "0",
+        "-o", pages.as_posix(),
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode != 0:
+        logger.debug(f"dvisvgm failed on {output_file}, compiling one by one")
+        return
+
+    # dvisvgm may zero-pad the page numbers, so go by the number in each file name
+    for page_file in tex_dir.glob(f"{batch_file.stem}-*.svg"):
+        page = int(page_file.stem.rsplit("-", 1)[1])
+        if 1 <= page <= len(tex_files):
+            os.replace(page_file, tex_files[page - 1].with_suffix(".svg"))
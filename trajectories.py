@@ -0,0 +1,68 @@
+import numpy as np
+from typing import Sequence
+
+
+class Trajectory:
+    """A polyline through (S, 3) sample points with a cumulative arc-length table.
+
+    The table is built once, after that length is a lookup and every position
+    along the curve is a binary search, so moving an atom along it at constant
+    speed doesn't touch the curve geometry again.
+    """
+
+    def __init__(self, points: np.array, arcLength: np.array = None) -> None:
+        self.points = np.asarray(points, dtype=np.float64)
+        if arcLength is None:
+            segment = np.linalg.norm(np.diff(self.points, axis=0), axis=1)
+            arcLength = np.concatenate(([0.0], np.cumsum(segment)))
+        self.arcLength = arcLength
+        self.length: float = self.arcLength[-1]
+
+    @classmethod
+    def from_bezier(cls, start: np.array, startHandle: np.array, endHandle: np.array, end: np.array,
+                    samples: int = 128) -> 'Trajectory':
+        t = np.linspace(0, 1, samples)[:, None]
+        points = ((1 - t) ** 3 * start + 3 * (1 - t) ** 2 * t * startHandle
+                  + 3 * (1 - t) * t ** 2 * endHandle + t ** 3 * end)
+        return cls(points)
+
+    def point_at_length(self, s) -> np.array:
+        """Point(s) at arc length s from the start, clamped to the ends of the curve."""
+        s = np.clip(s, 0, self.length)
+        index = np.clip(np.searchsorted(self.arcLength, s, "right") - 1, 0, len(self.points) - 2)
+        segment = self.arcLength[index + 1] - self.arcLength[index]
+        alpha = np.where(segment > 0, (s - self.arcLength[index]) / np.where(segment > 0, segment, 1), 0)
+        alpha = np.asarray(alpha)[..., None]
+        return (1 - alpha) * self.points[index] + alpha * self.points[index + 1]
+
+    def point_from_proportion(self, proportion) -> np.array:
+        return self.point_at_length(np.asarray(proportion) * self.length)
+
+    def duration(self, speed: float) -> float:
+        return self.length / speed
+
+
+class TrajectoryLibrary:
+    """K curves of one family sampled at the same S parameter values into a
+    single (K, S, 3) array, with their (K, S) arc-length tables.
+
+    Indexing gives a Trajectory that views row k, so handing a curve to an
+    atom is an array slice and no curve is ever sampled again.
+    """
+
+    def __init__(self, points: np.array, parameters: Sequence[float]) -> None:
+        self.points = np.asarray(points, dtype=np.float64)
+        self.parameters = np.asarray(parameters, dtype=np.float64)
+        segment = np.linalg.norm(np.diff(self.points, axis=1), axis=2)
+        self.arcLength = np.concatenate((np.zeros((len(self.points), 1)), np.cumsum(segment, axis=1)), axis=1)
+        self.trajectories = [Trajectory(self.points[k], self.arcLength[k]) for k in range(len(self.points))]
+
+    def __len__(self) -> int:
+        return len(self.trajectories)
+
+    def __getitem__(self, k: int) -> Trajectory:
+        return self.trajectories[k]
+
+    def nearest(self, parameter: float) -> Trajectory:
+        """The curve whose parameter is closest to the given one."""
+        return self.trajectories[int(np.argmin(np.abs(self.parameters - parameter)))]
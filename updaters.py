@@ -0,0 +1,121 @@
+from manim import *
+import numpy as np
+from typing import Callable
+
+
+class BatchedDotUpdater:
+    """Group updater that steps a simulation once per frame and moves every dot
+    of the group in one vectorized pass.
+
+    The point arrays of all dots are made views into a single (N, K, 3) buffer,
+    so moving all of them is one array addition instead of a get_center and a
+    move_to per dot. If a dot gets its points replaced (or the group changes)
+    the buffer is rebuilt on the next frame.
+    """
+
+    def __init__(self, step: Callable[[float], None], positions: Callable[[], np.array]) -> None:
+        self.step = step
+        self.positions = positions
+        self.submobjects = []
+        self.buffer: np.array = None
+        self.centers: np.array = None
+
+    def __call__(self, group: Mobject, dt) -> None:
+        if dt > 0:
+            self.step(dt)
+
+        # An AtomCloud stores nothing but the centers, they are simply replaced
+        if hasattr(group, "set_centers"):
+            group.set_centers(self.positions())
+            return
+
+        target = np.asarray(self.positions(), dtype=np.float64)
+        if target.shape[1] == 2:
+            target = np.column_stack((target, np.zeros(len(target))))
+
+        if not self.is_bound(group):
+            self.bind(group)
+
+        shift = target - self.centers
+        if self.buffer is None:
+            for mob, delta in zip(self.submobjects, shift):
+                mob.shift(delta)
+        else:
+            self.buffer += shift[:, None, :]
+        self.centers = target
+
+    def is_bound(self, group: Mobject) -> bool:
+        if self.submobjects != group.submobjects:
+            return False
+        if self.buffer is None:
+            return True
+        return all(mob.points.base is self.buffer for mob in self.submobjects)
+
+    def bind(self, group: Mobject) -> None:
+        self.submobjects = list(group.submobjects)
+        self.centers = np.array([mob.get_center() for mob in self.submobjects]).reshape(-1, 3)
+
+        # Dots with different point counts can't share a buffer, those fall back to shift
+        shapes = {mob.points.shape for mob in self.submobjects}
+        if len(shapes) != 1:
+            self.buffer = None
+            return
+
+        self.buffer = np.array([mob.points for mob in self.submobjects])
+        for index, mob in enumerate(self.submobjects):
+            mob.points = self.buffer[index]
+
+
+def add_batched_updater(group: Mobject, step: Callable[[float], None],
+                        positions: Callable[[], np.array]) -> BatchedDotUpdater:
+    """Steps the simulation with step(dt) once per frame and moves the i-th
+    submobject of group to the i-th row of positions().
+    """
+    updater = BatchedDotUpdater(step, positions)
+    group.add_updater(updater)
+    group.update()
+    return updater
+
+
+class SimulationAnimation(Animation):
+    """Plays a simulation on group for run_time seconds as one animation.
+
+    simulation is anything with step(dt) and positions(), e.g. a
+    ParticleSystem, a VelocitySwapSystem or a TrajectoryPlayback. Every frame
+    steps it by the time since the last frame and moves the i-th submobject of
+    group to the i-th row of positions() (or of the positions callable, if one
+    is given). Simulated time always runs at the speed of the scene, so
+    rate_func is ignored.
+    """
+
+    def __init__(self, group: Mobject, simulation, positions: Callable[[], np.array] = None,
+                 run_time: float = 1, **kwargs) -> None:
+        super().__init__(group, run_time=run_time, **kwargs)
+        self.simulation = simulation
+        self.updater = BatchedDotUpdater(simulation.step, positions or simulation.positions)
+        self.time = 0
+
+    def create_starting_mobject(self) -> Mobject:
+        # Nothing is interpolated from the starting state, so skip copying every dot
+        return self.mobject
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        time = alpha * self.run_time
+        self.updater(self.mobject, time - self.time)
+        self.time = time
+
+
+class FollowTrajectory(Animation):
+    """Moves mobject along a trajectories.Trajectory at constant speed, shifted
+    by offset. Like MoveAlongPath, but the position comes from the trajectory's
+    arc-length table instead of sampling a curve mobject every frame.
+    """
+
+    def __init__(self, mobject: Mobject, trajectory, offset: np.array = ORIGIN,
+                 suspend_mobject_updating: bool = False, **kwargs) -> None:
+        self.trajectory = trajectory
+        self.offset = np.asarray(offset, dtype=np.float64)
+        super().__init__(mobject, suspend_mobject_updating=suspend_mobject_updating, **kwargs)
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        self.mobject.move_to(self.trajectory.point_from_proportion(self.rate_func(alpha)) + self.offset)
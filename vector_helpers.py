@@ -1,37 +1,37 @@
-import random
-import math
 import numpy as np
 
 def findQuadtrant(directionVector: np.array, xOffset:float = 0, yOffset: float = 0):
-        # Checks if vector is pointing up or down
+        return int(find_quadrants(np.asarray(directionVector)[None], xOffset, yOffset)[0])
+
+def find_quadrants(dirs: np.array, xOffset: float = 0, yOffset: float = 0) -> np.array:
+        # Checks if vectors are pointing up or down
         # refer to https://math.stackexchange.com/questions/324589/detecting-whether-a-point-is-above-or-below-a-slope
-        isUp = directionVector[1] > yOffset
-        isRight = directionVector[0] > xOffset
-        
-        if (isUp and isRight):
-            return 0
-        elif (isUp and not isRight):
-            return 1
-        elif (not isUp and not isRight):
-            return 2
-        else:
-            return 3
-        
-def randomDirection():
-        r = 1
-        t = random.random()
-        u = random.random()
-        x = r * math.sqrt(t) * math.cos(2 * math.pi * u)
-        y = r * math.sqrt(t) * math.sin(2 * math.pi * u)
-
-        v1 = np.array([x, y, 0]) / np.linalg.norm([x, y, 0])
-        return v1
-    
+        isUp = dirs[:, 1] > yOffset
+        isRight = dirs[:, 0] > xOffset
+
+        # 0: up right, 1: up left, 2: down left, 3: down right
+        return np.where(isUp, np.where(isRight, 0, 1), np.where(isRight, 3, 2))
+
+def randomDirection(rng: np.random.Generator = None):
+        return random_directions(1, rng)[0]
+
+def random_directions(n: int, rng: np.random.Generator = None) -> np.array:
+        """ Returns n random unit vectors in the xy plane as an (n, 3) array. """
+        if rng is None:
+            rng = np.random.default_rng()
+
+        angle = 2 * np.pi * rng.random(n)
+        return np.column_stack((np.cos(angle), np.sin(angle), np.zeros(n)))
+
 
 
 def unit_vector(vector):
     """ Returns the unit vector of the vector.  """
-    return vector / np.linalg.norm(vector)
+    return unit_vectors(np.asarray(vector, dtype=np.float64))
+
+def unit_vectors(arr: np.array) -> np.array:
+    """ Returns the unit vectors of the rows of 'arr'.  """
+    return arr / np.linalg.norm(arr, axis=-1, keepdims=True)
 
 def angle_between(v1: np.array, v2: np.array):
     """ Returns the angle in radians between vectors 'v1' and 'v2'::
@@ -43,6 +43,13 @@ def angle_between(v1: np.array, v2: np.array):
             3.141592653589793
     """
 
-    v1_u = unit_vector(v1)
-    v2_u = unit_vector(v2)
-    return np.arccos(np.clip(np.dot(v1_u, v2_u), -1.0, 1.0))
\ No newline at end of file
+    return angles_between(np.asarray(v1, dtype=np.float64), np.asarray(v2, dtype=np.float64))
+
+def angles_between(a: np.array, b: np.array) -> np.array:
+    """ Returns the angles in radians between the rows of 'a' and 'b'.
+        Either one can also be a single vector, which is broadcast.
+    """
+
+    a_u = unit_vectors(a)
+    b_u = unit_vectors(b)
+    return np.arccos(np.clip(np.sum(a_u * b_u, axis=-1), -1.0, 1.0))